@@ -1,32 +1,58 @@
 from __future__ import annotations
+import asyncio
+import hashlib
+import os
 import uuid
+from datetime import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from typing import AsyncIterator, List, Optional, Tuple
+
+import orjson
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 
 from schemas import (
-    MCPResponse, MCPError,
-    ListEventsInput, CreateFocusBlocksInput, HealthCheckInput
+    ListEventsInput, CreateFocusBlocksInput, HealthCheckInput, FindFreeSlotsInput, MCPResponse
 )
-from errors import MCPException, time_range_invalid, create_conflict
-from token_provider import get_valid_access_token
+from errors import MCPException, invalid_argument, time_range_invalid, create_conflict
+from token_provider import get_valid_access_token_async, start_token_refresh, token_stats
+import compression
+import lark_async_client
 import lark_client
-
-
-app = FastAPI(title="Lark MCP Server", version="0.1.0")
-
-
-def _ok(data: dict, request_id: str) -> JSONResponse:
-    body = MCPResponse(ok=True, data=data, error=None, request_id=request_id).model_dump()
-    return JSONResponse(status_code=200, content=body)
-
-def _fail(exc: MCPException, request_id: str) -> JSONResponse:
-    body = MCPResponse(
-        ok=False,
-        data=None,
-        error=MCPError(code=exc.code, message=exc.message, details=exc.details or {}),
-        request_id=request_id
-    ).model_dump()
-    return JSONResponse(status_code=exc.http_status, content=body)
+import lark_http
+import lark_retry
+import rate_limiter
+import singleflight
+import user_pool
+from event_cache import event_cache
+from event_normalize import merge_calendar_events, normalize_events, project_events
+import event_sync
+import free_slots
+import recurrence
+from event_sync import event_store
+
+
+app = FastAPI(title="Lark MCP Server", version="0.1.0", default_response_class=ORJSONResponse)
+
+# focus block 배치에서 동시에 보낼 create_event 수
+FOCUS_BLOCK_CONCURRENCY = int(os.getenv("LARK_FOCUS_BLOCK_CONCURRENCY", "8"))
+
+
+# 응답 envelope 은 schemas.MCPResponse 모양 그대로 dict 로 만들고 orjson 으로 한 번만 인코딩한다.
+# (MCPResponse 검증 + model_dump 복사 + stdlib json 재직렬화로 큰 이벤트 목록을 세 번 훑던 것을 한 번으로)
+# 엔드포인트의 response_model=MCPResponse 는 OpenAPI 문서용: Response 를 직접 돌려주므로 검증/변환은 일어나지 않는다.
+def _ok(data: dict, request_id: str) -> ORJSONResponse:
+    body = {"ok": True, "data": data, "error": None, "request_id": request_id}
+    return ORJSONResponse(status_code=200, content=body)
+
+def _fail(exc: MCPException, request_id: str) -> ORJSONResponse:
+    body = {
+        "ok": False,
+        "data": None,
+        "error": {"code": exc.code, "message": exc.message, "details": exc.details or {}},
+        "request_id": request_id,
+    }
+    return ORJSONResponse(status_code=exc.http_status, content=body)
 
 
 @app.middleware("http")
@@ -38,105 +64,383 @@ async def add_request_id(request: Request, call_next):
     return response
 
 
+# 이 크기 이상이면 압축을 스레드에서 (이벤트 루프를 오래 막지 않도록)
+_COMPRESS_IN_THREAD_BYTES = 256 * 1024
+
+
+@app.middleware("http")
+async def compress_response(request: Request, call_next):
+    response = await call_next(request)
+    content_type = response.headers.get("content-type", "")
+    if "content-encoding" in response.headers or not content_type.startswith(compression.COMPRESSIBLE_TYPES):
+        return response
+    encoding = compression.choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    headers["vary"] = "accept-encoding"
+    if len(body) >= compression.COMPRESS_MIN_BYTES:
+        if len(body) >= _COMPRESS_IN_THREAD_BYTES:
+            body = await asyncio.to_thread(compression.compress, body, encoding)
+        else:
+            body = compression.compress(body, encoding)
+        headers["content-encoding"] = encoding
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
 @app.exception_handler(MCPException)
 async def mcp_exception_handler(request: Request, exc: MCPException):
     return _fail(exc, request.state.request_id)
 
 
-@app.get("/health")
+@app.on_event("startup")
+def start_token_refresher():
+    # 첫 요청 전에 토큰(LARK_AUTH_MODE: user / tenant)을 메모리로 올리고 만료 전 자동 갱신 시작
+    # (다중 사용자 모드는 사용자별 토큰을 요청 때 user_pool 에서 읽음)
+    if not user_pool.MULTI_USER:
+        start_token_refresh()
+
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    lark_http.close_session()
+    await lark_http.aclose_async_client()
+
+
+@app.get("/health", response_model=MCPResponse)
 def health(request: Request):
     return _ok({"status": "ok"}, request.state.request_id)
 
 
+@app.get("/metrics", response_model=MCPResponse)
+def metrics(request: Request):
+    return _ok(
+        {
+            "http_pool": lark_http.pool_stats(),
+            "async_http_pool": lark_http.async_pool_stats(),
+            "retries": lark_retry.retry_stats(),
+            "rate_limiter": rate_limiter.limiter_stats(),
+            "event_cache": event_cache.stats(),
+            "calendar_list_cache": lark_client.calendar_list_cache_stats(),
+            "singleflight": singleflight.singleflight_stats(),
+            "incremental_sync": event_store.stats(),
+            "recurrence": recurrence.recurrence_stats(),
+            "auth_token": token_stats(),
+            "user_pool": user_pool.pool_stats(),
+        },
+        request.state.request_id
+    )
+
+
+async def _access_token(request: Request) -> str:
+    """요청에 쓸 Lark 토큰 (다중 사용자 모드면 요청한 사용자의 토큰)"""
+    if user_pool.MULTI_USER:
+        return await user_pool.user_pool.get_token_async(request.headers)
+    return await get_valid_access_token_async()
+
+
 # -------------------- Tool #1: list events --------------------
-@app.post("/mcp/tools/lark_calendar_list_events")
-def tool_list_events(payload: ListEventsInput, request: Request):
+async def _fetch_events(token: str, calendar_id: str, start_ts: int, end_ts: int) -> list:
+    """정규화된 이벤트 조회 (event_cache → 증분 동기화 스토어 또는 upstream 범위 조회 순)"""
+    events, _ = await _fetch_events_versioned(token, calendar_id, start_ts, end_ts)
+    return events
+
+
+async def _fetch_events_versioned(token: str, calendar_id: str, start_ts: int, end_ts: int) -> Tuple[list, str]:
+    """_fetch_events + 이벤트 목록의 version (event_cache window 에 저장된 값)"""
+    cached = event_cache.get_versioned(token, calendar_id, start_ts, end_ts)
+    if cached is not None:
+        return cached
+
+    if event_sync.INCREMENTAL_SYNC and event_store.covers(start_ts):
+        # 캘린더 로컬 스토어 + sync_token 변경분만 받아서 응답
+        normalized = await event_store.query(token, calendar_id, start_ts, end_ts)
+    elif end_ts - start_ts > lark_async_client.SHARD_SECONDS:
+        # 넓은 범위(월/분기)는 시간 샤드로 나눠 동시에 조회
+        raw_events = await lark_async_client.list_events_sharded(
+            access_token=token,
+            calendar_id=calendar_id,
+            start_ts=start_ts,
+            end_ts=end_ts,
+        )
+        normalized = normalize_events(raw_events)
+    else:
+        # 페이지가 도착하는 대로 정규화 (raw 이벤트 전체 리스트를 따로 만들지 않음)
+        normalized = []
+        async for page in lark_async_client.iter_event_pages(
+            access_token=token,
+            calendar_id=calendar_id,
+            start_ts=start_ts,
+            end_ts=end_ts,
+        ):
+            normalized.extend(normalize_events(page))
+
+    # 반복 일정 master → 조회 구간 안의 회차들 (캐시에는 전개된 회차를 저장)
+    normalized = recurrence.expand_recurring(normalized, start_ts, end_ts)
+    # 캐시 window 와 같은 순서(시작 시각, stable) → 캐시 적중 여부와 관계없이 version 이 같음
+    normalized.sort(key=lambda e: e.start_ts)
+    version = event_cache.put(token, calendar_id, start_ts, end_ts, normalized)
+    return normalized, version
+
+
+@app.post("/mcp/tools/lark_calendar_list_events", response_model=MCPResponse)
+async def tool_list_events(payload: ListEventsInput, request: Request):
     if payload.range_end_ts < payload.range_start_ts:
         raise time_range_invalid("range_end_ts must be >= range_start_ts")
 
-    token = get_valid_access_token()
-    calendar_id = payload.calendar_id or lark_client.get_primary_calendar_id(token)
+    token = await _access_token(request)
+    if payload.stream:
+        if payload.calendar_ids:
+            calendar_ids, multi = list(dict.fromkeys(payload.calendar_ids)), True
+        else:
+            calendar_ids = [payload.calendar_id or await lark_async_client.get_primary_calendar_id(token)]
+            multi = False
+        return StreamingResponse(
+            _stream_list_events(
+                payload.stream, token, calendar_ids, multi,
+                payload.range_start_ts, payload.range_end_ts, request.state.request_id, payload.fields
+            ),
+            media_type=STREAM_MEDIA_TYPES[payload.stream],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    if payload.calendar_ids:
+        calendar_ids, streams, failed, version = await _list_events_multi(
+            token, payload.calendar_ids, payload.range_start_ts, payload.range_end_ts, payload.fields
+        )
+        summary = {"calendar_ids": calendar_ids}
+        if payload.if_none_match == version:
+            return _versioned_ok(request, version, summary)
+        events = merge_calendar_events(streams)
+        if payload.fields:
+            events = project_events(events, [*payload.fields, "calendar_id"])
+        return _versioned_ok(request, version, summary, {"events": events, "failed": failed})
+
+    calendar_id = payload.calendar_id or await lark_async_client.get_primary_calendar_id(token)
+
+    normalized, events_ver = await _fetch_events_versioned(
+        token, calendar_id, payload.range_start_ts, payload.range_end_ts
+    )
+    version = _content_version(calendar_id, events_ver, payload.fields)
+    summary = {"calendar_id": calendar_id}
+    if payload.if_none_match == version:
+        return _versioned_ok(request, version, summary)
+    return _versioned_ok(request, version, summary, {"events": project_events(normalized, payload.fields)})
+
+
+def _content_version(*parts) -> str:
+    """응답 version / ETag: 캘린더별 이벤트 version(event_cache) + 요청 옵션의 해시 (이벤트를 다시 직렬화하지 않음)"""
+    return hashlib.blake2b(orjson.dumps(parts), digest_size=12).hexdigest()
+
+
+def _versioned_ok(request: Request, version: str, summary: dict, content: Optional[dict] = None) -> Response:
+    """
+    version 을 붙여 응답 (ETag 헤더에도 같은 값).
+    content 가 없으면 {..summary, version, not_modified: true} → 호출자는 if_none_match 필드가 version 과 같으면
+    events 를 만들거나 직렬화하기 전에 content 없이 부른다.
+    POST 도구라서 HTTP If-None-Match / 304 는 쓰지 않는다 (RFC 9110: 304 는 GET/HEAD 전용).
+    """
+    if content is None:
+        data = {**summary, "version": version, "not_modified": True}
+    else:
+        data = {**summary, **content, "version": version, "not_modified": False}
+    response = _ok(data, request.state.request_id)
+    response.headers["etag"] = f'"{version}"'
+    return response
+
 
-    raw_events = lark_client.list_events(
-        access_token=token,
-        calendar_id=calendar_id,
-        start_ts=payload.range_start_ts,
-        end_ts=payload.range_end_ts,
+async def _list_events_multi(
+    token: str, calendar_ids: list, start_ts: int, end_ts: int, fields: Optional[List[str]] = None
+) -> tuple:
+    """
+    여러 캘린더를 동시에 조회. 캘린더 단위 실패는 failed 로 모은다.
+    (calendar_ids, [(calendar_id, events)], failed, version) 반환 → 합치기/응답 변환은 내용이 바뀌었을 때만 호출자가
+    """
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+
+    async def fetch(calendar_id: str) -> tuple:
+        """(events, version, None) 또는 (None, None, failed 항목)"""
+        try:
+            return (*await _fetch_events_versioned(token, calendar_id, start_ts, end_ts), None)
+        except MCPException as exc:
+            return None, None, {"calendar_id": calendar_id, "reason": exc.message, "error_code": exc.code}
+        except Exception as e:
+            return None, None, {"calendar_id": calendar_id, "reason": str(e), "error_code": "MCP_INTERNAL"}
+
+    results = await asyncio.gather(*(fetch(calendar_id) for calendar_id in calendar_ids))
+    streams = [(calendar_id, events) for calendar_id, (events, _, _) in zip(calendar_ids, results) if events is not None]
+    failed = [err for _, _, err in results if err is not None]
+    version = _content_version(
+        calendar_ids, [(calendar_id, v) for calendar_id, (_, v, _) in zip(calendar_ids, results)], failed, fields
     )
+    return calendar_ids, streams, failed, version
+
+
+# -------------------- Tool #1: list events (streaming) --------------------
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _stream_record(fmt: str, kind: str, data: dict) -> bytes:
+    """NDJSON: {"type": kind, "data": ...} 한 줄 / SSE: event: kind + data: ..."""
+    if fmt == "sse":
+        return b"event: " + kind.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+    return orjson.dumps({"type": kind, "data": data}) + b"\n"
+
+
+def _stream_error(exc: BaseException, calendar_id: Optional[str] = None) -> dict:
+    if isinstance(exc, MCPException):
+        error = {"code": exc.code, "message": exc.message, "details": exc.details or {}}
+    else:
+        error = {"code": "MCP_INTERNAL", "message": str(exc), "details": {}}
+    if calendar_id is not None:
+        error["calendar_id"] = calendar_id
+    return error
+
 
-    # Normalize (최소 필드만)
-    normalized = []
-    for e in raw_events:
-        # Lark event 구조는 API 응답에 따라 다를 수 있으니 안전하게 처리
-        event_id = e.get("event_id") or ""
-        summary = e.get("summary") or ""
-        start_ts = int((e.get("start_time") or {}).get("timestamp") or 0)
-        end_ts = int((e.get("end_time") or {}).get("timestamp") or 0)
-        is_all_day = bool(e.get("is_all_day", False))
-
-        normalized.append({
-            "event_id": event_id,
-            "summary": summary,
-            "start_ts": start_ts,
-            "end_ts": end_ts,
-            "is_all_day": is_all_day,
-            "location": e.get("location"),
-            "organizer": (e.get("organizer") or {}).get("email") if isinstance(e.get("organizer"), dict) else None,
-        })
-
-    return _ok({"calendar_id": calendar_id, "events": normalized}, request.state.request_id)
+async def _iter_calendar_events(token: str, calendar_id: str, start_ts: int, end_ts: int) -> AsyncIterator[list]:
+    """
+    _fetch_events 의 스트리밍 버전: 정규화된 이벤트를 준비되는 대로 묶음 단위로 yield.
+
+    - 페이지가 도착할 때마다 바로 내보낸다 (샤딩 없이 page_token 순서대로, 다음 페이지는 prefetch)
+    - 반복 일정 master/예외 회차는 다른 페이지에 나뉘어 올 수 있어서 마지막에 모아서 전개
+    - 응답 전체를 메모리에 모으지 않기 위해 결과를 event_cache 에 넣지는 않는다 (캐시 조회는 함)
+    """
+    cached = event_cache.get(token, calendar_id, start_ts, end_ts)
+    if cached is not None:
+        yield cached
+        return
+
+    if event_sync.INCREMENTAL_SYNC and event_store.covers(start_ts):
+        normalized = await event_store.query(token, calendar_id, start_ts, end_ts)
+        yield recurrence.expand_recurring(normalized, start_ts, end_ts)
+        return
+
+    recurring: List[dict] = []
+    async for page in lark_async_client.iter_event_pages(
+        access_token=token,
+        calendar_id=calendar_id,
+        start_ts=start_ts,
+        end_ts=end_ts,
+    ):
+        ready = []
+        for e in normalize_events(page):
+            if e.recurrence or e.is_exception or e.recurring_event_id:
+                recurring.append(e)
+            else:
+                ready.append(e)
+        if ready:
+            yield ready
+    if recurring:
+        yield recurrence.expand_recurring(recurring, start_ts, end_ts)
+
+
+async def _stream_list_events(
+    fmt: str, token: str, calendar_ids: List[str], multi: bool, start_ts: int, end_ts: int, request_id: str,
+    fields: Optional[List[str]] = None,
+) -> AsyncIterator[bytes]:
+    """이벤트 레코드들 + 마지막 trailer 레코드(request_id, 개수, 에러). 중간 에러도 trailer 로 전달"""
+    if fields and multi:
+        fields = [*fields, "calendar_id"]
+    count = 0
+    errors: List[dict] = []
+
+    if not multi:
+        try:
+            async for batch in _iter_calendar_events(token, calendar_ids[0], start_ts, end_ts):
+                count += len(batch)
+                yield b"".join(_stream_record(fmt, "event", e) for e in project_events(batch, fields))
+        except Exception as exc:
+            errors.append(_stream_error(exc))
+    else:
+        # 캘린더별로 동시에 조회하고, 먼저 끝난 캘린더부터 출처 calendar_id 를 붙여 내보냄
+        tasks = {
+            asyncio.ensure_future(_fetch_events(token, calendar_id, start_ts, end_ts)): calendar_id
+            for calendar_id in calendar_ids
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(_stream_error(task.exception(), tasks[task]))
+                        continue
+                    events = [e.with_calendar(tasks[task]) for e in task.result()]
+                    count += len(events)
+                    yield b"".join(_stream_record(fmt, "event", e) for e in project_events(events, fields))
+        finally:
+            # 클라이언트가 끊으면 남은 조회는 취소
+            for task in pending:
+                task.cancel()
+
+    trailer = {"ok": not errors, "request_id": request_id, "count": count, "errors": errors}
+    if multi:
+        trailer["calendar_ids"] = calendar_ids
+    else:
+        trailer["calendar_id"] = calendar_ids[0]
+    yield _stream_record(fmt, "end", trailer)
 
 
 # -------------------- Tool #2: create focus blocks (batch) --------------------
-@app.post("/mcp/tools/lark_calendar_create_focus_blocks")
-def tool_create_focus_blocks(payload: CreateFocusBlocksInput, request: Request):
-    token = get_valid_access_token()
-    calendar_id = payload.calendar_id or lark_client.get_primary_calendar_id(token)
+@app.post("/mcp/tools/lark_calendar_create_focus_blocks", response_model=MCPResponse)
+async def tool_create_focus_blocks(payload: CreateFocusBlocksInput, request: Request):
+    token = await _access_token(request)
+    calendar_id = payload.calendar_id or await lark_async_client.get_primary_calendar_id(token)
 
     visibility = payload.visibility or "private"
     free_busy = payload.free_busy_status or "busy"
     description = payload.description or "Focus Block"
 
-    created = []
-    failed = []
-
     # summary prefix는 기존 스킬 컨벤션 유지(원하면 바꾸기)
     summary = f"🔒 Focus: {payload.title}"
 
-    for blk in payload.blocks:
+    sem = asyncio.Semaphore(max(1, FOCUS_BLOCK_CONCURRENCY))
+
+    async def create_block(blk) -> tuple:
+        """(created 항목, None) 또는 (None, failed 항목)"""
         start_ts = blk.start_ts
         end_ts = start_ts + blk.duration_min * 60
 
         try:
-            event_id = lark_client.create_event(
-                access_token=token,
-                calendar_id=calendar_id,
-                summary=summary,
-                start_ts=start_ts,
-                end_ts=end_ts,
-                description=description,
-                visibility=visibility,
-                free_busy_status=free_busy,
-            )
-            created.append({"event_id": event_id, "start_ts": start_ts, "end_ts": end_ts})
+            async with sem:
+                event_id = await lark_async_client.create_event(
+                    access_token=token,
+                    calendar_id=calendar_id,
+                    summary=summary,
+                    start_ts=start_ts,
+                    end_ts=end_ts,
+                    description=description,
+                    visibility=visibility,
+                    free_busy_status=free_busy,
+                )
+            event_cache.invalidate(calendar_id, start_ts, end_ts)
+            event_store.mark_stale(calendar_id)
+            return {"event_id": event_id, "start_ts": start_ts, "end_ts": end_ts}, None
 
         except MCPException as exc:
             # 충돌/권한/레이트리밋 등은 표준 에러코드로 내려가지만,
             # batch에서는 "툴 전체 실패" 대신 슬롯 단위 실패로 축적
-            failed.append({
+            return None, {
                 "start_ts": start_ts,
                 "duration_min": blk.duration_min,
                 "reason": exc.message,
                 "error_code": exc.code,
-            })
+            }
 
         except Exception as e:
-            failed.append({
+            return None, {
                 "start_ts": start_ts,
                 "duration_min": blk.duration_min,
                 "reason": str(e),
                 "error_code": "MCP_INTERNAL",
-            })
+            }
+
+    # 동시에 생성하되 결과는 입력 블록 순서대로 모은다
+    results = await asyncio.gather(*(create_block(blk) for blk in payload.blocks))
+    created = [ok for ok, _ in results if ok is not None]
+    failed = [err for _, err in results if err is not None]
 
     return _ok(
         {"calendar_id": calendar_id, "created": created, "failed": failed},
@@ -145,15 +449,15 @@ def tool_create_focus_blocks(payload: CreateFocusBlocksInput, request: Request):
 
 
 # -------------------- Tool #3: health check --------------------
-@app.post("/mcp/tools/lark_calendar_health_check")
-def tool_health_check(payload: HealthCheckInput, request: Request):
-    token = get_valid_access_token()
-    calendar_id = payload.calendar_id or lark_client.get_primary_calendar_id(token)
+@app.post("/mcp/tools/lark_calendar_health_check", response_model=MCPResponse)
+async def tool_health_check(payload: HealthCheckInput, request: Request):
+    token = await _access_token(request)
+    calendar_id = payload.calendar_id or await lark_async_client.get_primary_calendar_id(token)
 
     # read test
     can_read = True
     try:
-        _ = lark_client.list_events(token, calendar_id, 0, 1)
+        _ = await lark_async_client.list_events(token, calendar_id, 0, 1)
     except MCPException:
         can_read = False
 
@@ -165,3 +469,64 @@ def tool_health_check(payload: HealthCheckInput, request: Request):
         {"calendar_id": calendar_id, "token_ok": True, "can_read": can_read, "can_write": can_write},
         request.state.request_id
     )
+
+
+# -------------------- Tool #4: find free slots --------------------
+def _parse_hhmm(value: str) -> time:
+    hour, minute = value.split(":")
+    return time(int(hour), int(minute))
+
+
+@app.post("/mcp/tools/lark_calendar_find_free_slots", response_model=MCPResponse)
+async def tool_find_free_slots(payload: FindFreeSlotsInput, request: Request):
+    if payload.range_end_ts < payload.range_start_ts:
+        raise time_range_invalid("range_end_ts must be >= range_start_ts")
+
+    work_start = _parse_hhmm(payload.work_start)
+    work_end = _parse_hhmm(payload.work_end)
+    if work_end <= work_start:
+        raise invalid_argument("work_end must be later than work_start")
+    try:
+        tz = ZoneInfo(payload.timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise invalid_argument(f"Unknown timezone: {payload.timezone}")
+
+    token = await _access_token(request)
+    if payload.calendar_ids:
+        calendar_ids = list(dict.fromkeys(payload.calendar_ids))
+    else:
+        calendar_ids = [payload.calendar_id or await lark_async_client.get_primary_calendar_id(token)]
+
+    # list_events 와 같은 경로(캐시/증분 동기화/샤딩)로 캘린더별 이벤트를 동시에 조회
+    events_by_calendar = await asyncio.gather(*(
+        _fetch_events(token, calendar_id, payload.range_start_ts, payload.range_end_ts)
+        for calendar_id in calendar_ids
+    ))
+
+    # 팀 × 장기간이면 계산량이 커지므로 이벤트 루프를 막지 않도록 스레드에서 실행
+    slots = await asyncio.to_thread(
+        free_slots.find_common_free_slots,
+        events_by_calendar,
+        payload.range_start_ts,
+        payload.range_end_ts,
+        tz=tz,
+        work_start=work_start,
+        work_end=work_end,
+        breaks=[(_parse_hhmm(b.start), _parse_hhmm(b.end)) for b in payload.breaks],
+        min_block_min=payload.min_block_min,
+        weekdays_only=payload.weekdays_only,
+    )
+
+    return _ok(
+        {
+            "calendar_id": calendar_ids[0],
+            "calendar_ids": calendar_ids,
+            "timezone": payload.timezone,
+            "slots": [
+                {"start_ts": start, "end_ts": end, "duration_min": (end - start) // 60}
+                for start, end in slots
+            ],
+            "total_free_min": sum(end - start for start, end in slots) // 60,
+        },
+        request.state.request_id
+    )
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+캐시에 들고 있는 이벤트 1개당 메모리 비교
+
+기존 방식(정규화 결과를 dict 로 보관)과 Event(__slots__ + 반복 문자열 intern)를 비교한다.
+응답 body 를 디코딩 → 정규화 → raw 를 버린 뒤 남는 메모리를 tracemalloc 으로 잰다.
+
+사용법:
+    python3 bench_event_memory.py            # 이벤트 20000개
+    python3 bench_event_memory.py 100000     # 이벤트 수 지정
+"""
+import gc
+import sys
+import tracemalloc
+
+import orjson
+
+from bench_normalize import make_payload
+from event_normalize import _ts, normalize_events
+
+
+def normalize_dicts(items):
+    """기존 경로: 이벤트마다 응답 필드 전체를 담은 dict"""
+    normalized = []
+    for e in items:
+        get = e.get
+        organizer = get("organizer")
+        start_time = get("start_time")
+        normalized.append({
+            "event_id": get("event_id") or "",
+            "summary": get("summary") or "",
+            "start_ts": _ts(start_time),
+            "end_ts": _ts(get("end_time")),
+            "is_all_day": bool(get("is_all_day", False)),
+            "location": get("location"),
+            "organizer": organizer.get("email") if isinstance(organizer, dict) else None,
+            "recurrence": get("recurrence") or None,
+            "is_exception": bool(get("is_exception", False)),
+            "recurring_event_id": get("recurring_event_id") or None,
+            "timezone": start_time.get("timezone") if start_time else None,
+        })
+    return normalized
+
+
+def retained_bytes(raw, normalize):
+    """raw 디코딩 + 정규화 후 raw 를 버렸을 때 남는 바이트"""
+    gc.collect()
+    tracemalloc.start()
+    items = orjson.loads(raw)["data"]["items"]
+    events = normalize(items)
+    del items
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, events
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    raw = make_payload(n)
+
+    print("=" * 60)
+    print(f"📦 이벤트 {n}개")
+    print("=" * 60)
+
+    results = {}
+    for name, normalize in (("dict", normalize_dicts), ("Event (__slots__ + intern)", normalize_events)):
+        size, events = retained_bytes(raw, normalize)
+        assert len(events) == n
+        results[name] = size
+        print(f"  {name:<28} {size / n:8.0f} B/event  ({size / 1024 / 1024:6.1f} MiB)")
+        del events
+
+    base, compact = results.values()
+    print(f"\n💾 {base / compact:.2f}x 작음 (이벤트당 {(base - compact) / n:.0f} B 절약)")
+
+
+if __name__ == "__main__":
+    main()
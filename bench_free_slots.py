@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+팀 공통 빈 시간 계산 벤치마크 (캘린더 수 × 기간)
+
+순수 Python sweep-line(free_slots) 과 NumPy 비트맵 엔진(free_slots_numpy) 을 비교한다.
+이벤트는 분 단위로 정렬된 시각에 만들어지므로 두 엔진 결과가 같아야 한다.
+
+사용법:
+    python3 bench_free_slots.py                 # 캘린더 {1,10,50} × 기간 {7,30,90}일
+    python3 bench_free_slots.py 100 180         # 캘린더 100개 × 180일만
+"""
+import random
+import sys
+import timeit
+from datetime import time
+from zoneinfo import ZoneInfo
+
+import free_slots
+from event_normalize import Event
+
+TZ = ZoneInfo("Asia/Seoul")
+RANGE_START = 1767193200  # 2026-01-01 00:00 KST
+EVENTS_PER_DAY = 6
+
+
+def make_calendars(calendars, days, seed=0):
+    """캘린더마다 하루 EVENTS_PER_DAY 개의 15분 단위 일정"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(calendars):
+        events = []
+        for day in range(days):
+            day_start = RANGE_START + day * 86400
+            for _ in range(EVENTS_PER_DAY):
+                start = day_start + rng.randrange(8 * 4, 20 * 4) * 900
+                end = start + rng.choice((2, 3, 4, 6, 8)) * 900
+                events.append(Event("", "", start, end))
+        result.append(events)
+    return result
+
+
+def run(events_by_calendar, days, engine):
+    return free_slots.find_common_free_slots(
+        events_by_calendar,
+        RANGE_START,
+        RANGE_START + days * 86400,
+        tz=TZ,
+        work_start=time(10, 0),
+        work_end=time(19, 0),
+        breaks=[(time(11, 0), time(12, 0))],
+        min_block_min=30,
+        engine=engine,
+    )
+
+
+def bench(calendars, days):
+    events_by_calendar = make_calendars(calendars, days)
+    assert run(events_by_calendar, days, "python") == run(events_by_calendar, days, "numpy")
+
+    results = {}
+    for engine in ("python", "numpy"):
+        best = min(timeit.repeat(lambda: run(events_by_calendar, days, engine), number=3, repeat=3)) / 3
+        results[engine] = best
+
+    print(
+        f"  {calendars:>4} × {days:>4}일 ({calendars * days * EVENTS_PER_DAY:>7,} 이벤트)"
+        f"  python {results['python'] * 1000:8.2f} ms"
+        f"  numpy {results['numpy'] * 1000:8.2f} ms"
+        f"  ⚡ {results['python'] / results['numpy']:.1f}x"
+    )
+
+
+def main():
+    if free_slots.free_slots_numpy is None:
+        print("❌ numpy 가 설치되어 있지 않습니다: pip install numpy")
+        sys.exit(1)
+
+    if len(sys.argv) > 2:
+        cases = [(int(sys.argv[1]), int(sys.argv[2]))]
+    else:
+        cases = [(c, d) for c in (1, 10, 50) for d in (7, 30, 90)]
+
+    print("=" * 60)
+    print(f"📊 공통 빈 시간 계산 (해상도 {free_slots.FREE_SLOTS_RESOLUTION}초)")
+    print("=" * 60)
+    for calendars, days in cases:
+        bench(calendars, days)
+
+
+if __name__ == "__main__":
+    main()
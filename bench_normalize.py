@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+이벤트 디코딩 + 정규화 마이크로벤치마크
+
+기존 경로(json.loads + app.py 의 .get() 체인 루프)와
+event_normalize 경로(orjson.loads + 한 번의 패스 정규화)를 비교한다.
+
+사용법:
+    python3 bench_normalize.py            # 이벤트 5000개
+    python3 bench_normalize.py 20000      # 이벤트 수 지정
+"""
+import json
+import sys
+import timeit
+
+import orjson
+
+from event_normalize import normalize_events
+
+
+def make_payload(n):
+    """DATA_STRUCTURE.md 의 Event 객체 모양으로 Lark list_events 응답 생성"""
+    items = []
+    for i in range(n):
+        start = 1764723600 + i * 1800
+        items.append({
+            "event_id": f"3430be1f-29bc-48b4-a9eb-{i:012d}_0",
+            "summary": f"bi-weekly Product&HR #{i}",
+            "description": "",
+            "status": "confirmed",
+            "color": -1,
+            "start_time": {"timestamp": str(start), "timezone": "Asia/Seoul"},
+            "end_time": {"timestamp": str(start + 1800), "timezone": "Asia/Seoul"},
+            "create_time": "1763366905",
+            "recurrence": "FREQ=WEEKLY;INTERVAL=2;BYDAY=WE" if i % 5 == 0 else "",
+            "is_exception": False,
+            "event_organizer": {"display_name": "Sinki Kang", "user_id": "ou_ea27c6efaf4836ce8c43c668e6e94ab8"},
+            "organizer_calendar_id": "feishu.cn_kTIzmBy1DaFDRMcF15hN2f@group.calendar.feishu.cn",
+            "visibility": "default",
+            "free_busy_status": "busy",
+            "vchat": {"meeting_url": "https://vc-sg.larksuite.com/j/568169883", "vc_type": "vc"},
+            "reminders": [{"minutes": 5}],
+            "app_link": "https://applink.larksuite.com/client/calendar/event/detail?calendarId=757&key=3430be1f",
+        })
+    return json.dumps({"code": 0, "msg": "success", "data": {"items": items, "has_more": False}}).encode()
+
+
+def baseline(raw):
+    """기존 경로: resp.json() + tool_list_events 의 정규화 루프"""
+    data = json.loads(raw)
+    raw_events = (((data.get("data") or {}).get("items")) or [])
+    normalized = []
+    for e in raw_events:
+        event_id = e.get("event_id") or ""
+        summary = e.get("summary") or ""
+        start_ts = int((e.get("start_time") or {}).get("timestamp") or 0)
+        end_ts = int((e.get("end_time") or {}).get("timestamp") or 0)
+        is_all_day = bool(e.get("is_all_day", False))
+
+        normalized.append({
+            "event_id": event_id,
+            "summary": summary,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
+            "is_all_day": is_all_day,
+            "location": e.get("location"),
+            "organizer": (e.get("organizer") or {}).get("email") if isinstance(e.get("organizer"), dict) else None,
+            "recurrence": e.get("recurrence") or None,
+            "is_exception": bool(e.get("is_exception", False)),
+            "recurring_event_id": e.get("recurring_event_id") or None,
+            "timezone": (e.get("start_time") or {}).get("timezone"),
+        })
+    return normalized
+
+
+def normalize_events_json(raw):
+    """현재 경로: orjson.loads + event_normalize 의 한 번의 패스 정규화"""
+    data = orjson.loads(raw)
+    return normalize_events(((data.get("data") or {}).get("items")) or [])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    raw = make_payload(n)
+
+    assert baseline(raw) == [e.to_dict() for e in normalize_events_json(raw)]
+
+    print("=" * 60)
+    print(f"📦 이벤트 {n}개, 응답 크기 {len(raw) / 1024:.0f} KiB")
+    print("=" * 60)
+
+    results = {}
+    for name, fn in (("baseline (json + .get loop)", baseline), ("fast (orjson + one pass)", normalize_events_json)):
+        number = max(1, 50000 // n)
+        best = min(timeit.repeat(lambda: fn(raw), number=number, repeat=5)) / number
+        results[name] = best
+        print(f"  {name:<30} {best * 1000:8.2f} ms  ({n / best:,.0f} events/s)")
+
+    base, fast = results.values()
+    print(f"\n⚡ {base / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
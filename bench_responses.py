@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+list_events 응답 처리량 벤치마크 (requests/sec)
+
+기존 응답 경로(MCPResponse → model_dump() → JSONResponse 의 stdlib json)와
+현재 경로(envelope dict → ORJSONResponse 한 번에 인코딩)를 같은 앱에서 비교한다.
+upstream 조회는 빼고(_fetch_events_versioned 를 합성 이벤트로 대체) 응답 인코딩만 잰다.
+
+사용법:
+    python3 bench_responses.py              # 이벤트 {100, 1000, 5000}개
+    python3 bench_responses.py 20000        # 이벤트 수 지정
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+from fastapi.responses import JSONResponse
+
+import app
+from event_normalize import Event, events_version
+from schemas import MCPResponse
+
+RANGE_START = 1767193200  # 2026-01-01 00:00 KST
+DURATION = 2.0
+
+
+def make_events(n):
+    return [
+        Event(
+            f"evt_{i:06d}", f"회의 {i % 50}", RANGE_START + i * 1800, RANGE_START + i * 1800 + 3600,
+            False, "회의실 A" if i % 3 else None, "owner@example.com", None, False, None, "Asia/Seoul",
+        )
+        for i in range(n)
+    ]
+
+
+def legacy_ok(data, request_id):
+    """기존 경로: Pydantic 모델 생성 → dict 로 되돌림 → stdlib json 으로 다시 직렬화"""
+    return JSONResponse(
+        status_code=200,
+        content=MCPResponse(ok=True, data=data, error=None, request_id=request_id).model_dump(),
+    )
+
+
+async def requests_per_sec(client, body):
+    # 예열 + 응답 확인
+    r = await client.post("/mcp/tools/lark_calendar_list_events", json=body)
+    assert r.status_code == 200 and r.json()["ok"], r.text
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < DURATION:
+        await client.post("/mcp/tools/lark_calendar_list_events", json=body)
+        count += 1
+    return count / (time.perf_counter() - started), len(r.content)
+
+
+async def bench(n):
+    events = make_events(n)
+    version = events_version(events)
+
+    async def fake_fetch(token, calendar_id, start_ts, end_ts):
+        return events, version
+
+    app._fetch_events_versioned = fake_fetch
+    body = {"calendar_id": "cal", "range_start_ts": RANGE_START, "range_end_ts": RANGE_START + 86400 * 365}
+    transport = httpx.ASGITransport(app=app.app)
+    # 압축 미들웨어는 제외하고 인코딩만 비교
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers={"Accept-Encoding": "identity"}
+    ) as client:
+        results = {}
+        fast_ok = app._ok
+        for name, ok in (("legacy", legacy_ok), ("orjson", fast_ok)):
+            app._ok = ok
+            results[name] = await requests_per_sec(client, body)
+        app._ok = fast_ok
+
+    (legacy, size), (fast, _) = results["legacy"], results["orjson"]
+    print(
+        f"  {n:>6,} 이벤트 ({size / 1024:7.1f} KiB)"
+        f"  legacy {legacy:8.1f} req/s"
+        f"  orjson {fast:8.1f} req/s"
+        f"  ⚡ {fast / legacy:.1f}x"
+    )
+
+
+def main():
+    counts = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 1000, 5000]
+    async def fake_token():
+        return "bench-token"
+
+    app.get_valid_access_token_async = fake_token
+
+    print("=" * 60)
+    print(f"🚀 list_events 응답 처리량 (케이스당 {DURATION:.0f}초 반복)")
+    print("=" * 60)
+    for n in counts:
+        asyncio.run(bench(n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import gzip
+import os
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:  # zstandard 미설치 → gzip 만 지원
+    zstandard = None
+
+# 툴 응답(JSON) 압축 - 클라이언트 Accept-Encoding 에 맞춰 zstd > gzip 순으로 선택
+# 스트리밍 응답(NDJSON/SSE)은 첫 이벤트 지연을 늘리지 않도록 압축하지 않는다.
+COMPRESS_MIN_BYTES = int(os.getenv("LARK_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("LARK_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("LARK_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+def _supported() -> tuple:
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Accept-Encoding 헤더 → 사용할 인코딩 (q=0 은 제외, q 가 같으면 zstd 우선)"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in _supported():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
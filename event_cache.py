@@ -0,0 +1,176 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from event_normalize import Event, events_version, overlaps
+
+from token_provider import token_scope
+
+# list_events 결과 캐시 (프로세스 메모리)
+# - (토큰, calendar_id) 별로 이미 조회한 시간 구간(window)을 보관
+# - 조회 구간이 기존 window 안에 포함되면 upstream 없이 로컬에서 응답
+# - TTL 만료 + 전체 이벤트 수 기준 LRU eviction
+# - window 마다 내용 해시(version)를 저장할 때 한 번 계산 → 같은 조회 반복 시 not_modified 를 직렬화 없이 판단
+EVENT_CACHE_TTL = float(os.getenv("LARK_EVENT_CACHE_TTL", "30"))
+EVENT_CACHE_MAX_EVENTS = int(os.getenv("LARK_EVENT_CACHE_MAX_EVENTS", "50000"))
+_MAX_SLICE_VERSIONS = 64
+
+
+class _Window:
+    __slots__ = ("scope", "calendar_id", "start_ts", "end_ts", "events", "starts", "expires_at",
+                 "version", "_slice_versions")
+
+    def __init__(self, scope: str, calendar_id: str, start_ts: int, end_ts: int,
+                 events: List[Event], expires_at: float):
+        self.scope = scope
+        self.calendar_id = calendar_id
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.events = sorted(events, key=lambda e: e.start_ts)
+        self.starts = [e.start_ts for e in self.events]
+        self.expires_at = expires_at
+        self.version = events_version(self.events)
+        # 일부 구간 조회의 version (구간별 한 번만 계산)
+        self._slice_versions: Dict[Tuple[int, int], str] = {}
+
+    def __lt__(self, other: "_Window") -> bool:
+        return self.start_ts < other.start_ts
+
+    def covers(self, start_ts: int, end_ts: int) -> bool:
+        return self.start_ts <= start_ts and end_ts <= self.end_ts
+
+    def slice(self, start_ts: int, end_ts: int) -> List[Event]:
+        if start_ts == self.start_ts and end_ts == self.end_ts:
+            return list(self.events)
+        # start_ts < end 인 이벤트만 후보 → 그중 구간과 겹치는 것
+        hi = bisect_left(self.starts, end_ts)
+        if start_ts == end_ts:
+            hi = bisect_right(self.starts, end_ts)
+        return [e for e in self.events[:hi] if overlaps(e, start_ts, end_ts)]
+
+    def slice_version(self, start_ts: int, end_ts: int, events: List[Event]) -> str:
+        """slice(start_ts, end_ts) 결과(events)의 version. 같은 내용이면 upstream 에서 바로 받은 것과 같은 값"""
+        if start_ts == self.start_ts and end_ts == self.end_ts:
+            return self.version
+        key = (start_ts, end_ts)
+        version = self._slice_versions.get(key)
+        if version is None:
+            if len(self._slice_versions) >= _MAX_SLICE_VERSIONS:
+                self._slice_versions.clear()
+            version = self._slice_versions[key] = events_version(events)
+        return version
+
+
+class EventCache:
+    """
+    정규화된 이벤트의 시간 구간 캐시.
+
+    calendar_id 별로 window 를 시작 시각 순으로 정렬해 두고(interval index),
+    조회 구간을 완전히 덮는 유효한 window 가 있으면 그 window 에서 잘라서 돌려준다.
+    """
+
+    def __init__(self, ttl: float = EVENT_CACHE_TTL, max_events: int = EVENT_CACHE_MAX_EVENTS):
+        self.ttl = ttl
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[_Window]] = {}
+        self._lru: "OrderedDict[int, _Window]" = OrderedDict()
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _find(self, access_token: str, calendar_id: str, start_ts: int, end_ts: int) -> Optional[_Window]:
+        if self.ttl <= 0:
+            return None
+        scope = token_scope(access_token)
+        now = time.monotonic()
+        with self._lock:
+            windows = self._index.get(calendar_id) or []
+            # start_ts 이전에 시작하는 window 만 후보
+            candidates = windows[:bisect_right([w.start_ts for w in windows], start_ts)]
+            for w in reversed(candidates):
+                if w.expires_at <= now:
+                    self._remove(w)
+                    continue
+                if w.scope == scope and w.covers(start_ts, end_ts):
+                    self._lru.move_to_end(id(w))
+                    self._stats["hits"] += 1
+                    return w
+            self._stats["misses"] += 1
+            return None
+
+    def get(self, access_token: str, calendar_id: str, start_ts: int, end_ts: int) -> Optional[List[Event]]:
+        window = self._find(access_token, calendar_id, start_ts, end_ts)
+        return None if window is None else window.slice(start_ts, end_ts)
+
+    def get_versioned(
+        self, access_token: str, calendar_id: str, start_ts: int, end_ts: int
+    ) -> Optional[Tuple[List[Event], str]]:
+        """get + 결과의 version (events_version 과 같은 값, window 에 저장해 둔 것을 재사용)"""
+        window = self._find(access_token, calendar_id, start_ts, end_ts)
+        if window is None:
+            return None
+        events = window.slice(start_ts, end_ts)
+        return events, window.slice_version(start_ts, end_ts, events)
+
+    def put(self, access_token: str, calendar_id: str, start_ts: int, end_ts: int,
+            events: List[Event]) -> str:
+        """window 저장. 이벤트 목록의 version 반환 (저장하지 않는 경우에도 계산)"""
+        if self.ttl <= 0 or len(events) > self.max_events:
+            return events_version(events)
+        window = _Window(token_scope(access_token), calendar_id, start_ts, end_ts,
+                         events, time.monotonic() + self.ttl)
+        with self._lock:
+            # 새 window 에 완전히 포함되는 기존 window 는 더 이상 필요 없음
+            for w in list(self._index.get(calendar_id) or []):
+                if w.scope == window.scope and window.covers(w.start_ts, w.end_ts):
+                    self._remove(w)
+            insort(self._index.setdefault(calendar_id, []), window)
+            self._lru[id(window)] = window
+            self._size += len(window.events)
+            while self._size > self.max_events and self._lru:
+                oldest = next(iter(self._lru.values()))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+        return window.version
+
+    def invalidate(self, calendar_id: str, start_ts: int, end_ts: int) -> None:
+        """[start_ts, end_ts] 와 겹치는 window 제거 (모든 토큰 대상). 이벤트 생성/삭제 후 호출"""
+        with self._lock:
+            for w in list(self._index.get(calendar_id) or []):
+                if w.start_ts <= end_ts and start_ts <= w.end_ts:
+                    self._remove(w)
+                    self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index.clear()
+            self._lru.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "windows": len(self._lru),
+                "events": self._size,
+                "ttl": self.ttl,
+                "max_events": self.max_events,
+            }
+
+    def _remove(self, window: _Window) -> None:
+        windows = self._index.get(window.calendar_id)
+        if windows and window in windows:
+            windows.remove(window)
+            if not windows:
+                del self._index[window.calendar_id]
+        if self._lru.pop(id(window), None) is not None:
+            self._size -= len(window.events)
+
+
+event_cache = EventCache()
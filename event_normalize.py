@@ -0,0 +1,187 @@
+from __future__ import annotations
+import hashlib
+import heapq
+import os
+import sys
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import orjson
+
+# Lark raw event → 내부 이벤트(Event) 정규화
+# - 이벤트 수천 개 단위로 돌기 때문에 dict 조회/임시 객체를 최소화한 한 번의 패스로 만든다.
+# - 캐시/증분 동기화 스토어/반복 일정 전개/빈 시간 계산은 Event 를 그대로 쓰고,
+#   응답 JSON(이벤트 dict)으로는 응답 직전에만 바꾼다 (project_events).
+
+# 날짜만 있는 종일 일정(start_time.date)의 시간대가 없을 때 기준으로 삼을 시간대
+DEFAULT_TIMEZONE = os.getenv("LARK_DEFAULT_TIMEZONE", "Asia/Seoul")
+
+# 이벤트마다 반복되는 문자열(시간대, 주최자, 장소, 반복 규칙, 캘린더 ID)은 intern 해서 하나의 객체를 공유
+_intern = sys.intern
+
+
+@dataclass(slots=True)
+class Event:
+    """
+    정규화된 이벤트. dict 대신 __slots__ 로 이벤트당 메모리를 줄인다 (bench_event_memory.py).
+    캐시/single-flight 가 같은 객체를 공유하므로 만든 뒤에는 바꾸지 않는다 (바꿀 땐 새 Event).
+    """
+    event_id: str
+    summary: str
+    start_ts: int
+    end_ts: int
+    is_all_day: bool = False
+    location: Optional[str] = None
+    organizer: Optional[str] = None
+    recurrence: Optional[str] = None
+    is_exception: bool = False
+    recurring_event_id: Optional[str] = None
+    timezone: Optional[str] = None
+    # calendar_ids 로 여러 캘린더를 조회했을 때만 채워짐
+    calendar_id: Optional[str] = None
+    # 내부용: 증분 동기화 스토어의 삭제된 반복 회차 표식 ("cancelled"), 응답에는 나가지 않음
+    status: Optional[str] = None
+
+    def with_calendar(self, calendar_id: str) -> "Event":
+        return Event(
+            self.event_id, self.summary, self.start_ts, self.end_ts, self.is_all_day, self.location,
+            self.organizer, self.recurrence, self.is_exception, self.recurring_event_id, self.timezone,
+            _intern(calendar_id), self.status,
+        )
+
+    def occurrence(self, event_id: str, start_ts: int, end_ts: int) -> "Event":
+        """반복 일정 master → 회차"""
+        return Event(
+            event_id, self.summary, start_ts, end_ts, self.is_all_day, self.location,
+            self.organizer, self.recurrence, False, self.event_id, self.timezone,
+            self.calendar_id, self.status,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {
+            "event_id": self.event_id,
+            "summary": self.summary,
+            "start_ts": self.start_ts,
+            "end_ts": self.end_ts,
+            "is_all_day": self.is_all_day,
+            "location": self.location,
+            "organizer": self.organizer,
+            "recurrence": self.recurrence,
+            "is_exception": self.is_exception,
+            "recurring_event_id": self.recurring_event_id,
+            "timezone": self.timezone,
+        }
+        if self.calendar_id is not None:
+            d["calendar_id"] = self.calendar_id
+        return d
+
+
+def _ts(t: Any) -> int:
+    # {"timestamp": "1764723600", ...} → 1764723600 (없으면 0)
+    if t:
+        v = t.get("timestamp")
+        if v:
+            return int(v)
+    return 0
+
+
+def _zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return dt_timezone.utc
+
+
+def _date_ts(value: str, tz_name: str, next_day: bool = False) -> int:
+    # "2026-01-03" → 그 날 0시(tz_name 기준) ts. next_day 면 다음 날 0시
+    day = date.fromisoformat(value) + timedelta(days=1 if next_day else 0)
+    return int(datetime.combine(day, datetime.min.time(), tzinfo=_zone(tz_name)).timestamp())
+
+
+def normalize_event(e: Dict[str, Any]) -> Event:
+    # Lark event 구조는 API 응답에 따라 다를 수 있으니 안전하게 처리
+    get = e.get
+    organizer = get("organizer")
+    organizer = organizer.get("email") if isinstance(organizer, dict) else None
+    start_time = get("start_time")
+    end_time = get("end_time")
+    timezone = start_time.get("timezone") if start_time else None
+    location = get("location")
+    recurrence = get("recurrence") or None
+    start_ts, end_ts = _ts(start_time), _ts(end_time)
+    is_all_day = bool(get("is_all_day", False))
+    if not start_ts and start_time and start_time.get("date"):
+        # 날짜만 있는 종일 일정 → 시작일 0시 ~ 종료일 다음 날 0시 (timestamp 일정과 같은 기준으로 구간 비교)
+        timezone = timezone or DEFAULT_TIMEZONE
+        start_date = start_time["date"]
+        try:
+            start_ts = _date_ts(start_date, timezone)
+            end_ts = max(
+                _date_ts((end_time or {}).get("date") or start_date, timezone, next_day=True), start_ts + 86400
+            )
+            is_all_day = True
+        except ValueError:
+            start_ts = end_ts = 0
+    return Event(
+        get("event_id") or "",
+        get("summary") or "",
+        start_ts,
+        end_ts,
+        is_all_day,
+        _intern(location) if type(location) is str else location,
+        _intern(organizer) if type(organizer) is str else organizer,
+        # 반복 일정 전개(recurrence.expand_recurring)에 필요한 정보
+        _intern(recurrence) if recurrence else None,
+        bool(get("is_exception", False)),
+        get("recurring_event_id") or None,
+        _intern(timezone) if timezone else None,
+    )
+
+
+def normalize_events(items: List[Dict[str, Any]]) -> List[Event]:
+    return [normalize_event(e) for e in items]
+
+
+def overlaps(e: Event, start_ts: int, end_ts: int) -> bool:
+    """이벤트가 조회 구간 [start_ts, end_ts] 에 걸치는지 (캐시/증분 스토어에서 구간을 잘라낼 때 공용)"""
+    if e.start_ts >= end_ts and not e.start_ts == start_ts == end_ts:
+        return False
+    return e.end_ts > start_ts or e.start_ts >= start_ts
+
+
+_sort_key = attrgetter("start_ts", "end_ts")
+_all_fields = attrgetter(*(f.name for f in dataclass_fields(Event)))
+
+
+def events_version(events: Sequence[Event]) -> str:
+    """
+    이벤트 목록 내용의 안정적인 해시 (list_events 응답 version 의 재료).
+    응답 dict 로 바꾸지 않고 필드 튜플만 직렬화한다. event_cache 가 window 마다 한 번 계산해 둔다.
+    """
+    return hashlib.blake2b(orjson.dumps([_all_fields(e) for e in events]), digest_size=12).hexdigest()
+
+
+def merge_calendar_events(streams: Sequence[Tuple[str, List[Event]]]) -> List[Event]:
+    """
+    캘린더별 이벤트 리스트 → 시간순으로 합친 하나의 리스트 (각 이벤트에 calendar_id 태그)
+
+    캘린더마다 정렬(이미 거의 정렬돼 있어 O(n))한 뒤 heap 기반 k-way merge → O(N log k).
+    시작/종료가 같으면 streams 순서(요청한 calendar_ids 순서)를 따른다.
+    캐시/single-flight 가 공유하는 이벤트를 건드리지 않도록 태그는 복사본에 붙인다.
+    """
+    tagged = [
+        [e.with_calendar(calendar_id) for e in sorted(events, key=_sort_key)]
+        for calendar_id, events in streams
+    ]
+    return list(heapq.merge(*tagged, key=_sort_key))
+
+
+def project_events(events: List[Event], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """응답 경계: Event → 응답 dict (fields 가 있으면 그 필드만)"""
+    if not fields:
+        return [e.to_dict() for e in events]
+    fields = tuple(dict.fromkeys(fields))
+    return [{f: getattr(e, f) for f in fields} for e in events]
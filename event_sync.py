@@ -0,0 +1,147 @@
+from __future__ import annotations
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import lark_async_client
+from errors import MCPException
+from event_normalize import Event, normalize_event, overlaps
+from token_provider import token_scope
+
+# Lark sync_token 기반 증분 동기화 (opt-in)
+# - 캘린더별로 로컬 이벤트 스토어를 두고, 최초 1회만 전체를 받은 뒤
+#   이후에는 sync_token 으로 변경분(생성/수정/취소)만 받아 스토어에 반영한다.
+# - anchor(동기화 시작 시각) 이전 구간 조회는 스토어로 답할 수 없으므로 기존 범위 조회로 처리.
+INCREMENTAL_SYNC = os.getenv("LARK_INCREMENTAL_SYNC", "false").lower() in ("1", "true", "yes")
+SYNC_LOOKBACK_SECONDS = int(os.getenv("LARK_SYNC_LOOKBACK_SECONDS", str(30 * 24 * 3600)))
+SYNC_MIN_INTERVAL = float(os.getenv("LARK_SYNC_MIN_INTERVAL", "2"))
+SYNC_MAX_CALENDARS = int(os.getenv("LARK_SYNC_MAX_CALENDARS", "256"))
+
+
+class CalendarSyncState:
+    __slots__ = ("anchor_ts", "sync_token", "events", "synced_at", "stale", "lock", "_sorted")
+
+    def __init__(self, anchor_ts: int):
+        self.anchor_ts = anchor_ts
+        self.sync_token: Optional[str] = None
+        self.events: Dict[str, Event] = {}
+        self.synced_at = 0.0
+        self.stale = True
+        self.lock = asyncio.Lock()
+        self._sorted: Optional[List[Event]] = None
+
+    def reset(self) -> None:
+        self.events.clear()
+        self._sorted = None
+
+    def apply(self, raw_events: List[Dict[str, Any]]) -> int:
+        """변경분 반영. 반영한 이벤트 수 반환"""
+        for raw in raw_events:
+            event_id = raw.get("event_id")
+            if not event_id:
+                continue
+            if raw.get("status") == "cancelled":
+                self.events.pop(event_id, None)
+                if raw.get("recurring_event_id") or raw.get("is_exception"):
+                    # 삭제된 반복 일정 회차 → 전개할 때 그 회차를 빼도록 표식으로 남김
+                    marker = normalize_event(raw)
+                    marker.status = "cancelled"
+                    self.events[event_id] = marker
+            else:
+                self.events[event_id] = normalize_event(raw)
+        if raw_events:
+            self._sorted = None
+        return len(raw_events)
+
+    def query(self, start_ts: int, end_ts: int) -> List[Event]:
+        if self._sorted is None:
+            self._sorted = sorted(self.events.values(), key=lambda e: e.start_ts)
+        # event_cache 와 같은 overlaps 기준 + 구간 이전에 시작한 반복 master 와 삭제 표식도 포함
+        # (recurrence.expand_recurring 에서 처리)
+        return [
+            e for e in self._sorted
+            if e.status == "cancelled" or overlaps(e, start_ts, end_ts) or (e.recurrence and e.start_ts < end_ts)
+        ]
+
+
+class EventStore:
+    """(토큰, calendar_id) 별 CalendarSyncState 보관 (LRU)"""
+
+    def __init__(self, max_calendars: int = SYNC_MAX_CALENDARS):
+        self.max_calendars = max_calendars
+        self._states: "OrderedDict[Tuple[str, str], CalendarSyncState]" = OrderedDict()
+        self._stats = {"full_syncs": 0, "incremental_syncs": 0, "changes_applied": 0, "resyncs": 0, "served": 0}
+
+    def covers(self, start_ts: int) -> bool:
+        return start_ts >= int(time.time()) - SYNC_LOOKBACK_SECONDS
+
+    async def query(self, access_token: str, calendar_id: str, start_ts: int, end_ts: int) -> List[Event]:
+        state = self._state(access_token, calendar_id)
+        async with state.lock:
+            if state.stale or time.monotonic() - state.synced_at >= SYNC_MIN_INTERVAL:
+                await self._sync(access_token, calendar_id, state)
+        self._stats["served"] += 1
+        return state.query(start_ts, end_ts)
+
+    def mark_stale(self, calendar_id: str) -> None:
+        """이 서버에서 쓰기를 했으면 다음 조회 때 바로 변경분을 받도록 표시"""
+        for (_, cid), state in self._states.items():
+            if cid == calendar_id:
+                state.stale = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": INCREMENTAL_SYNC,
+            "calendars": len(self._states),
+            "events": sum(len(s.events) for s in self._states.values()),
+            **self._stats,
+        }
+
+    def _state(self, access_token: str, calendar_id: str) -> CalendarSyncState:
+        key = (token_scope(access_token), calendar_id)
+        state = self._states.get(key)
+        if state is None:
+            state = CalendarSyncState(anchor_ts=int(time.time()) - SYNC_LOOKBACK_SECONDS)
+            self._states[key] = state
+            while len(self._states) > self.max_calendars:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+        return state
+
+    async def _sync(self, access_token: str, calendar_id: str, state: CalendarSyncState) -> None:
+        if state.sync_token is None:
+            await self._full_sync(access_token, calendar_id, state)
+            return
+        try:
+            changes, next_token = await lark_async_client.list_event_changes(
+                access_token, calendar_id, sync_token=state.sync_token
+            )
+        except MCPException as exc:
+            if exc.code in ("LARK_AUTH_REQUIRED", "LARK_PERMISSION_DENIED", "LARK_RATE_LIMITED"):
+                raise
+            # sync_token 만료/무효 → 처음부터 다시
+            self._stats["resyncs"] += 1
+            await self._full_sync(access_token, calendar_id, state)
+            return
+        self._stats["incremental_syncs"] += 1
+        self._stats["changes_applied"] += state.apply(changes)
+        state.sync_token = next_token
+        state.synced_at = time.monotonic()
+        state.stale = False
+
+    async def _full_sync(self, access_token: str, calendar_id: str, state: CalendarSyncState) -> None:
+        events, next_token = await lark_async_client.list_event_changes(
+            access_token, calendar_id, anchor_ts=state.anchor_ts
+        )
+        state.reset()
+        state.apply(events)
+        state.sync_token = next_token
+        state.synced_at = time.monotonic()
+        state.stale = False
+        self._stats["full_syncs"] += 1
+
+
+event_store = EventStore()
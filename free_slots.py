@@ -0,0 +1,177 @@
+from __future__ import annotations
+import os
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from event_normalize import Event
+
+try:
+    import free_slots_numpy
+except ImportError:  # numpy 미설치 → 순수 Python 경로만 사용
+    free_slots_numpy = None
+
+# 빈 시간 찾기 (sweep-line)
+# 1. 조회 범위의 날짜별 근무시간에서 휴식시간을 뺀 "가용 구간"을 시간순으로 만든다.
+# 2. 바쁜 구간(이벤트)을 한 번만 정렬/병합한다.
+# 3. 두 정렬된 리스트를 한 번씩만 훑으면서(two-pointer) 틈을 찾는다.
+# → 날짜마다 이벤트 전체를 다시 훑던 lark_calendar.find_free_slots 와 달리 O((D + E) log E)
+
+# 캘린더가 많은 팀 단위 조회는 NumPy 비트맵 엔진(free_slots_numpy)으로 계산할 수 있다.
+# - python (기본): 정확한 sweep-line
+# - auto: numpy 가 있고 하루당 이벤트 수(≈ 캘린더 수 × 캘린더당 하루 일정 수)가
+#   FREE_SLOTS_NUMPY_MIN_EVENTS_PER_DAY 이상이면 NumPy. 비트맵 비용은 기간(칸 수)에, sweep-line 은 이벤트 수에
+#   비례하므로 이벤트 총수가 아니라 기간 대비 밀도로 고른다 (bench_free_slots.py: 10캘린더 × 90일은 Python 이 빠름).
+#   NumPy 는 resolution 에 맞춰 안쪽으로 반올림하므로 경계가 resolution 배수가 아니면 결과가 조금 좁아질 수 있다.
+# - numpy: 강제 (numpy 미설치 시 python)
+FREE_SLOTS_ENGINE = os.getenv("LARK_FREE_SLOTS_ENGINE", "python").lower()
+FREE_SLOTS_RESOLUTION = int(os.getenv("LARK_FREE_SLOTS_RESOLUTION", "60"))
+FREE_SLOTS_NUMPY_MIN_EVENTS_PER_DAY = int(os.getenv("LARK_FREE_SLOTS_NUMPY_MIN_EVENTS_PER_DAY", "150"))
+
+Interval = Tuple[int, int]
+
+DEFAULT_WORK_START = time(10, 0)
+DEFAULT_WORK_END = time(19, 0)
+DEFAULT_BREAKS: Tuple[Tuple[time, time], ...] = ((time(11, 0), time(12, 0)),)
+
+
+def _ts(d: date, t: time, tz: Optional[tzinfo]) -> int:
+    # tz=None 이면 서버 로컬 시간 기준
+    return int(datetime.combine(d, t, tzinfo=tz).timestamp())
+
+
+def working_windows(
+    start_ts: int,
+    end_ts: int,
+    tz: Optional[tzinfo] = None,
+    work_start: time = DEFAULT_WORK_START,
+    work_end: time = DEFAULT_WORK_END,
+    breaks: Sequence[Tuple[time, time]] = DEFAULT_BREAKS,
+    weekdays_only: bool = True,
+) -> List[Interval]:
+    """[start_ts, end_ts] 안의 근무시간 - 휴식시간 구간 (시간순, 겹침 없음)"""
+    windows: List[Interval] = []
+    day = datetime.fromtimestamp(start_ts, tz).date()
+    last_day = datetime.fromtimestamp(end_ts, tz).date()
+    breaks = sorted(breaks)
+
+    while day <= last_day:
+        if not (weekdays_only and day.weekday() >= 5):
+            cursor = _ts(day, work_start, tz)
+            day_end = _ts(day, work_end, tz)
+            for break_start, break_end in breaks:
+                b_start = max(_ts(day, break_start, tz), cursor)
+                b_end = min(_ts(day, break_end, tz), day_end)
+                if b_start < b_end:
+                    if cursor < b_start:
+                        windows.append((cursor, b_start))
+                    cursor = b_end
+            if cursor < day_end:
+                windows.append((cursor, day_end))
+        day += timedelta(days=1)
+
+    # 조회 범위로 자르기
+    clipped = []
+    for w_start, w_end in windows:
+        w_start, w_end = max(w_start, start_ts), min(w_end, end_ts)
+        if w_start < w_end:
+            clipped.append((w_start, w_end))
+    return clipped
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """정렬 1번 + 겹치거나 맞닿은 구간 병합"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def find_gaps(windows: Sequence[Interval], busy: Sequence[Interval], min_block_seconds: int) -> List[Interval]:
+    """
+    windows, busy 모두 시간순 + 겹침 없음이어야 함.
+    각 window 에서 busy 를 뺀 나머지 중 min_block_seconds 이상인 구간.
+    """
+    gaps: List[Interval] = []
+    i = 0
+    n = len(busy)
+    for w_start, w_end in windows:
+        # 이 window 이전에 끝난 busy 는 이후 window 에도 영향 없음 → 건너뜀
+        while i < n and busy[i][1] <= w_start:
+            i += 1
+        cursor = w_start
+        j = i
+        while j < n and busy[j][0] < w_end:
+            b_start, b_end = busy[j]
+            if b_start > cursor and b_start - cursor >= min_block_seconds:
+                gaps.append((cursor, b_start))
+            cursor = max(cursor, b_end)
+            if cursor >= w_end:
+                break
+            j += 1
+        if w_end > cursor and w_end - cursor >= min_block_seconds:
+            gaps.append((cursor, w_end))
+    return gaps
+
+
+def busy_intervals(events: Iterable[Event]) -> List[Interval]:
+    """정규화된 이벤트 → 바쁜 구간 (종일 일정과 시간 정보가 없는 이벤트는 제외)"""
+    return merge_intervals(
+        (e.start_ts, e.end_ts) for e in events
+        if e.start_ts and e.end_ts > e.start_ts and not e.is_all_day
+    )
+
+
+def _use_numpy(event_count: int, days: float, engine: Optional[str]) -> bool:
+    engine = engine or FREE_SLOTS_ENGINE
+    if free_slots_numpy is None or engine == "python":
+        return False
+    if engine == "numpy":
+        return True
+    return engine == "auto" and event_count >= FREE_SLOTS_NUMPY_MIN_EVENTS_PER_DAY * max(days, 1.0)
+
+
+def find_common_free_slots(
+    events_by_calendar: Sequence[Iterable[Event]],
+    start_ts: int,
+    end_ts: int,
+    tz: Optional[tzinfo] = None,
+    work_start: time = DEFAULT_WORK_START,
+    work_end: time = DEFAULT_WORK_END,
+    breaks: Sequence[Tuple[time, time]] = DEFAULT_BREAKS,
+    min_block_min: int = 30,
+    weekdays_only: bool = True,
+    engine: Optional[str] = None,
+) -> List[Interval]:
+    """모든 캘린더가 동시에 비어 있는 빈 시간 (캘린더 1개면 find_free_slots 와 같음)"""
+    windows = working_windows(start_ts, end_ts, tz, work_start, work_end, breaks, weekdays_only)
+    events_by_calendar = [e if isinstance(e, list) else list(e) for e in events_by_calendar]
+
+    days = (end_ts - start_ts) / 86400
+    if _use_numpy(sum(len(events) for events in events_by_calendar), days, engine):
+        return free_slots_numpy.find_common_gaps(
+            windows, events_by_calendar, start_ts, end_ts, min_block_min * 60, FREE_SLOTS_RESOLUTION
+        )
+    # 캘린더 구분 없이 한 번에 병합하면 그게 곧 "한 명이라도 바쁜" 구간
+    busy = busy_intervals(e for events in events_by_calendar for e in events)
+    return find_gaps(windows, busy, min_block_min * 60)
+
+
+def find_free_slots(
+    events: Iterable[Event],
+    start_ts: int,
+    end_ts: int,
+    tz: Optional[tzinfo] = None,
+    work_start: time = DEFAULT_WORK_START,
+    work_end: time = DEFAULT_WORK_END,
+    breaks: Sequence[Tuple[time, time]] = DEFAULT_BREAKS,
+    min_block_min: int = 30,
+    weekdays_only: bool = True,
+    engine: Optional[str] = None,
+) -> List[Interval]:
+    return find_common_free_slots(
+        [events], start_ts, end_ts, tz, work_start, work_end, breaks, min_block_min, weekdays_only, engine
+    )
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from event_normalize import Event
+
+# NumPy 비트맵 기반 빈 시간 계산 (free_slots 의 fast path)
+# - 조회 범위를 resolution 초 단위 칸으로 나눈 비트맵으로 계산한다.
+# - 바쁨 = 모든 캘린더 이벤트의 합집합(OR), 공통 빈 시간 = 근무시간 AND NOT 바쁨(교집합)
+# - 구간 → 비트맵은 "시작 칸 +1 / 끝 칸 -1" 을 bincount 로 찍고 누적합 > 0 으로 만든다.
+#   (정렬/병합 없이 O(이벤트 수 + 칸 수))
+# - 빈 칸의 연속 구간(run)은 diff 로 한 번에 찾는다.
+# 경계는 보수적으로 맞춘다: 바쁜 구간은 바깥쪽(시작 내림, 끝 올림), 근무 구간은 안쪽으로 칸에 맞춘다.
+# → 결과 구간은 항상 정확한 계산(free_slots.find_gaps) 결과 안에 들어간다.
+#   (이벤트/근무시간이 resolution 의 배수이면 결과가 완전히 같다)
+
+Interval = Tuple[int, int]
+
+
+def event_arrays(events_by_calendar: Sequence[Iterable[Event]]) -> Tuple[np.ndarray, np.ndarray]:
+    """정규화된 이벤트들 → (starts, ends) int64 배열 (종일 일정과 시간 정보가 없는 이벤트는 제외)"""
+    starts: List[int] = []
+    ends: List[int] = []
+    for events in events_by_calendar:
+        for e in events:
+            if e.is_all_day:
+                continue
+            starts.append(e.start_ts)
+            ends.append(e.end_ts)
+    starts_arr = np.array(starts, dtype=np.int64)
+    ends_arr = np.array(ends, dtype=np.int64)
+    keep = (starts_arr > 0) & (ends_arr > starts_arr)
+    return starts_arr[keep], ends_arr[keep]
+
+
+class Grid:
+    __slots__ = ("origin", "resolution", "size")
+
+    def __init__(self, start_ts: int, end_ts: int, resolution: int):
+        self.resolution = resolution
+        self.origin = start_ts - start_ts % resolution
+        self.size = max(0, -(-(end_ts - self.origin) // resolution))
+
+    def _index(self, ts: np.ndarray, round_up: bool) -> np.ndarray:
+        offset = ts - self.origin
+        idx = -(-offset // self.resolution) if round_up else offset // self.resolution
+        return np.clip(idx, 0, self.size)
+
+    def _mask(self, start_idx: np.ndarray, end_idx: np.ndarray) -> np.ndarray:
+        marks = np.bincount(start_idx, minlength=self.size + 1) - np.bincount(end_idx, minlength=self.size + 1)
+        return np.cumsum(marks[:-1]) > 0
+
+    def busy_mask(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """구간들의 합집합 비트맵 (겹쳐도 상관없음)"""
+        return self._mask(self._index(starts, False), self._index(ends, True))
+
+    def window_mask(self, windows: Sequence[Interval]) -> np.ndarray:
+        if not windows:
+            return np.zeros(self.size, dtype=bool)
+        arr = np.asarray(windows, dtype=np.int64)
+        return self._mask(self._index(arr[:, 0], True), self._index(arr[:, 1], False))
+
+    def runs(self, mask: np.ndarray, min_block_seconds: int) -> List[Interval]:
+        """True 가 연속된 구간 → [(start_ts, end_ts)]"""
+        edges = np.diff(mask, prepend=False, append=False).nonzero()[0]
+        starts, ends = edges[0::2], edges[1::2]
+        keep = (ends - starts) * self.resolution >= min_block_seconds
+        starts = self.origin + starts[keep] * self.resolution
+        ends = self.origin + ends[keep] * self.resolution
+        return list(zip(starts.tolist(), ends.tolist()))
+
+
+def find_common_gaps(
+    windows: Sequence[Interval],
+    events_by_calendar: Sequence[Iterable[Event]],
+    start_ts: int,
+    end_ts: int,
+    min_block_seconds: int,
+    resolution: int = 60,
+) -> List[Interval]:
+    """모든 캘린더가 동시에 비어 있는 근무 구간 중 min_block_seconds 이상인 것"""
+    grid = Grid(start_ts, end_ts, resolution)
+    if grid.size == 0:
+        return []
+    # windows 는 이미 [start_ts, end_ts] 로 잘려 있고 안쪽으로 칸에 맞추므로 결과도 범위 안
+    free = grid.window_mask(windows) & ~grid.busy_mask(*event_arrays(events_by_calendar))
+    return grid.runs(free, min_block_seconds)
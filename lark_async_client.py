@@ -0,0 +1,287 @@
+from __future__ import annotations
+import asyncio
+import os
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from errors import MCPException, upstream_error
+from lark_client import (
+    EVENTS_PAGE_SIZE, LARK_BASE, _cached_calendar_list, _env_calendar_id, _event_page_params,
+    _handle_lark_response, _on_lark_error, _parse_event_page, _pick_primary_calendar_id, _rate_user_scope,
+    _singleflight_key, _store_calendar_list,
+)
+from lark_http import get_async_client
+import rate_limiter
+from singleflight import AsyncSingleFlight
+from lark_retry import RetryState
+
+# lark_client 와 같은 함수들의 async 버전.
+# 서버(app.py)는 이쪽을 사용해서 upstream 대기 중에 threadpool 워커를 점유하지 않는다.
+
+# 넓은 범위 조회 시 시간 샤드 크기(초)와 동시에 조회할 샤드 수
+SHARD_SECONDS = int(os.getenv("LARK_LIST_SHARD_SECONDS", str(7 * 24 * 3600)))
+SHARD_CONCURRENCY = int(os.getenv("LARK_LIST_SHARD_CONCURRENCY", "4"))
+# 샤드마다 upstream 호출이 최소 1번 → 아주 넓은 범위(range_start_ts=0 등)는 샤드를 키워서 이 개수 이하로
+SHARD_MAX_COUNT = int(os.getenv("LARK_LIST_MAX_SHARDS", "16"))
+
+
+# 커넥션 수립 단계 실패 → 요청이 서버에 도달하지 않음
+_NEVER_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_singleflight = AsyncSingleFlight()
+
+
+async def _request(
+    method: str,
+    url: str,
+    access_token: str,
+    *,
+    idempotent: bool,
+    calendar_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """lark_client._request 의 async 버전"""
+    if method == "GET":
+        key = _singleflight_key(url, access_token, kwargs.get("params"))
+        return await _singleflight.do(
+            key,
+            lambda: _send(method, url, access_token, idempotent=idempotent,
+                          calendar_id=calendar_id, headers=headers, **kwargs),
+        )
+    return await _send(method, url, access_token, idempotent=idempotent,
+                       calendar_id=calendar_id, headers=headers, **kwargs)
+
+
+async def _send(
+    method: str,
+    url: str,
+    access_token: str,
+    *,
+    idempotent: bool,
+    calendar_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """lark_client._send 의 async 버전 (재시도 대기 중에도 이벤트 루프를 막지 않음)"""
+    headers = {**(headers or {}), "Authorization": f"Bearer {access_token}"}
+    user_scope = _rate_user_scope(access_token)
+    state = RetryState()
+    while True:
+        # 사용자 버킷 대기를 먼저 끝내고 공용(app / calendar) 버킷 예약
+        wait = rate_limiter.reserve_user(user_scope)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        wait = rate_limiter.reserve(calendar_id)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            resp = await get_async_client().request(method, url, headers=headers, **kwargs)
+        except httpx.TransportError as e:
+            await asyncio.sleep(state.after_transport_error(e, idempotent or isinstance(e, _NEVER_SENT_ERRORS)))
+            continue
+
+        try:
+            data = _handle_lark_response(resp)
+        except MCPException as exc:
+            _on_lark_error(exc, resp.status_code, access_token)
+            await asyncio.sleep(state.after_error_response(exc, resp.status_code, resp.headers, idempotent))
+            continue
+        state.succeeded()
+        return data
+
+
+async def list_calendars(access_token: str) -> List[Dict[str, Any]]:
+    """토큰으로 접근 가능한 캘린더 목록 (lark_client 와 같은 토큰별 캐시 공유)"""
+    cached = _cached_calendar_list(access_token)
+    if cached is not None:
+        return cached
+
+    url = f"{LARK_BASE}/calendar/v4/calendars"
+    data = await _request("GET", url, access_token, idempotent=True, timeout=15)
+    items = (((data.get("data") or {}).get("calendar_list")) or [])
+    _store_calendar_list(access_token, items)
+    return items
+
+
+async def get_primary_calendar_id(access_token: str) -> str:
+    # 1. 환경변수에서 먼저 확인 (수동 설정된 캘린더 ID, 다중 사용자 모드 제외)
+    env_calendar_id = _env_calendar_id()
+    if env_calendar_id:
+        return env_calendar_id
+
+    # 2. 캘린더 목록(캐시 또는 API)에서 primary 선택
+    return _pick_primary_calendar_id(await list_calendars(access_token))
+
+
+async def _fetch_event_page(
+    access_token: str, calendar_id: str, start_ts: int, end_ts: int, page_token: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    url = f"{LARK_BASE}/calendar/v4/calendars/{calendar_id}/events"
+    params = _event_page_params(start_ts, end_ts, page_token)
+    data = await _request(
+        "GET", url, access_token, idempotent=True, calendar_id=calendar_id, params=params, timeout=20
+    )
+    return _parse_event_page(data)
+
+
+async def iter_event_pages(
+    access_token: str, calendar_id: str, start_ts: int, end_ts: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    이벤트를 페이지 단위로 yield (page_token/has_more 끝까지).
+
+    현재 페이지를 넘기기 전에 다음 페이지 요청을 task로 먼저 띄워 둔다.
+    """
+    events, next_token = await _fetch_event_page(access_token, calendar_id, start_ts, end_ts, None)
+    while True:
+        pending = None
+        if next_token:
+            pending = asyncio.ensure_future(
+                _fetch_event_page(access_token, calendar_id, start_ts, end_ts, next_token)
+            )
+        try:
+            yield events
+        except BaseException:
+            # 호출자가 중간에 멈추면(aclose/취소) prefetch도 정리
+            if pending is not None:
+                pending.cancel()
+            raise
+        if pending is None:
+            return
+        events, next_token = await pending
+
+
+async def list_events(access_token: str, calendar_id: str, start_ts: int, end_ts: int) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    async for page in iter_event_pages(access_token, calendar_id, start_ts, end_ts):
+        events.extend(page)
+    return events
+
+
+async def list_event_changes(
+    access_token: str,
+    calendar_id: str,
+    sync_token: Optional[str] = None,
+    anchor_ts: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    증분 동기화용 조회. (변경된 이벤트, 다음 sync_token) 반환.
+
+    - sync_token 이 없으면 anchor_ts 이후 전체 이벤트 (최초 동기화)
+    - sync_token 이 있으면 그 이후 생성/수정/취소(status=cancelled)된 이벤트만
+    sync_token 은 마지막 페이지에서만 내려온다.
+    """
+    url = f"{LARK_BASE}/calendar/v4/calendars/{calendar_id}/events"
+    events: List[Dict[str, Any]] = []
+    page_token: Optional[str] = None
+    while True:
+        params = {"page_size": str(EVENTS_PAGE_SIZE)}
+        if page_token:
+            params["page_token"] = page_token
+        elif sync_token:
+            params["sync_token"] = sync_token
+        elif anchor_ts is not None:
+            params["anchor_time"] = str(anchor_ts)
+        data = await _request(
+            "GET", url, access_token, idempotent=True, calendar_id=calendar_id, params=params, timeout=20
+        )
+        body = data.get("data") or {}
+        events.extend(body.get("items") or [])
+        page_token = body.get("page_token") if body.get("has_more") else None
+        if not page_token:
+            return events, body.get("sync_token") or sync_token
+
+
+def split_time_range(
+    start_ts: int, end_ts: int, shard_seconds: int, max_shards: int = SHARD_MAX_COUNT
+) -> List[Tuple[int, int]]:
+    """[start_ts, end_ts] 를 shard_seconds 단위의 연속 구간으로 분할 (샤드가 max_shards 개를 넘으면 샤드를 키움)"""
+    if shard_seconds <= 0 or end_ts - start_ts <= shard_seconds:
+        return [(start_ts, end_ts)]
+    if max_shards > 0 and end_ts - start_ts > shard_seconds * max_shards:
+        shard_seconds = -(-(end_ts - start_ts) // max_shards)
+    shards = []
+    cursor = start_ts
+    while cursor < end_ts:
+        shard_end = min(cursor + shard_seconds, end_ts)
+        shards.append((cursor, shard_end))
+        cursor = shard_end
+    return shards
+
+
+async def list_events_sharded(
+    access_token: str,
+    calendar_id: str,
+    start_ts: int,
+    end_ts: int,
+    shard_seconds: int = SHARD_SECONDS,
+    max_concurrency: int = SHARD_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    넓은 범위를 시간 샤드로 나눠 동시에 조회한 뒤 병합.
+
+    샤드 경계에 걸친 이벤트는 양쪽 샤드에 모두 나오므로 event_id 기준으로 중복 제거한다.
+    결과는 샤드 순서(=시간 순서)를 유지한다.
+    """
+    shards = split_time_range(start_ts, end_ts, shard_seconds)
+    if len(shards) == 1:
+        return await list_events(access_token, calendar_id, start_ts, end_ts)
+
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch(shard_start: int, shard_end: int) -> List[Dict[str, Any]]:
+        async with sem:
+            return await list_events(access_token, calendar_id, shard_start, shard_end)
+
+    results = await asyncio.gather(*(fetch(s, e) for s, e in shards))
+
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for shard_events in results:
+        for e in shard_events:
+            event_id = e.get("event_id")
+            if event_id:
+                if event_id in seen:
+                    continue
+                seen.add(event_id)
+            merged.append(e)
+    return merged
+
+
+async def create_event(
+    access_token: str,
+    calendar_id: str,
+    summary: str,
+    start_ts: int,
+    end_ts: int,
+    description: str,
+    visibility: str = "private",
+    free_busy_status: str = "busy",
+) -> str:
+    url = f"{LARK_BASE}/calendar/v4/calendars/{calendar_id}/events"
+    headers = {"Content-Type": "application/json"}
+
+    payload = {
+        "summary": summary,
+        "description": description,
+        "visibility": visibility,
+        "free_busy_status": free_busy_status,
+        "start_time": {"timestamp": str(start_ts)},
+        "end_time": {"timestamp": str(end_ts)},
+    }
+
+    # idempotency_key: 재시도로 같은 요청이 두 번 처리돼도 이벤트는 하나만 생성됨 → 5xx/타임아웃도 재시도 가능
+    params = {"idempotency_key": str(uuid.uuid4())}
+    data = await _request(
+        "POST", url, access_token, idempotent=True, calendar_id=calendar_id,
+        headers=headers, params=params, json=payload, timeout=20,
+    )
+
+    evt = (((data.get("data") or {}).get("event")) or {})
+    event_id = evt.get("event_id")
+    if not event_id:
+        raise upstream_error("Lark create_event succeeded but event_id missing.", {"raw": data})
+    return event_id
@@ -15,6 +15,9 @@ import requests
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+import free_slots as free_slot_engine
+from event_normalize import normalize_events
+
 # 환경변수 로드
 load_dotenv()
 
@@ -136,63 +139,17 @@ def find_free_slots(duration_minutes: int, min_block_minutes: int = 30):
     # 평일 일정 조회
     events = list_remaining_weekday_events()
 
-    # 날짜별로 빈 시간 찾기
-    all_free_slots = []
-    current_date = start_date
-
-    while current_date <= end_date:
-        # 주말 건너뛰기
-        if current_date.weekday() >= 5:
-            current_date += timedelta(days=1)
-            continue
-
-        # 이 날짜의 근무시간 정의 (10:00 ~ 19:00)
-        work_start = current_date.replace(hour=10, minute=0, second=0, microsecond=0)
-        work_end = current_date.replace(hour=19, minute=0, second=0, microsecond=0)
-
-        # 이 날짜의 바쁜 시간 수집
-        busy_slots = []
-
-        # 점심시간 추가 (11:00 ~ 12:00)
-        lunch_start = current_date.replace(hour=11, minute=0, second=0, microsecond=0)
-        lunch_end = current_date.replace(hour=12, minute=0, second=0, microsecond=0)
-        busy_slots.append((lunch_start, lunch_end))
-
-        # 이 날짜의 일정 추가
-        for event in events:
-            start = event.get("start_time", {})
-            end = event.get("end_time", {})
-
-            if "timestamp" in start and "timestamp" in end:
-                start_dt = datetime.fromtimestamp(int(start["timestamp"]))
-                end_dt = datetime.fromtimestamp(int(end["timestamp"]))
-
-                # 같은 날짜의 일정만 포함
-                if start_dt.date() == current_date.date():
-                    busy_slots.append((start_dt, end_dt))
-
-        busy_slots.sort()
-
-        # 빈 시간 찾기
-        current_time = work_start
-
-        for busy_start, busy_end in busy_slots:
-            if busy_start > current_time:
-                gap_minutes = int((busy_start - current_time).total_seconds() / 60)
-                if gap_minutes >= min_block_minutes:
-                    all_free_slots.append((current_time, busy_start, gap_minutes))
-
-            current_time = max(current_time, busy_end)
-
-        # 마지막 빈 시간 확인
-        if current_time < work_end:
-            gap_minutes = int((work_end - current_time).total_seconds() / 60)
-            if gap_minutes >= min_block_minutes:
-                all_free_slots.append((current_time, work_end, gap_minutes))
-
-        current_date += timedelta(days=1)
-
-    return all_free_slots
+    # 근무시간(10:00-19:00) - 점심(11:00-12:00) 에서 일정을 뺀 구간 (서버 API 와 같은 엔진 사용)
+    range_start = int(start_date.timestamp())
+    range_end = int(end_date.replace(hour=23, minute=59, second=59).timestamp())
+    slots = free_slot_engine.find_free_slots(
+        normalize_events(events), range_start, range_end, min_block_min=min_block_minutes
+    )
+
+    return [
+        (datetime.fromtimestamp(start), datetime.fromtimestamp(end), (end - start) // 60)
+        for start, end in slots
+    ]
 
 
 def create_focus_block(title: str, start_time: str, duration_minutes: int):
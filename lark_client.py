@@ -1,15 +1,37 @@
 from __future__ import annotations
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import httpx
+import orjson
 import requests
-from typing import Any, Dict, List, Optional
+from urllib3.exceptions import NewConnectionError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from errors import (
-    auth_required, permission_denied, rate_limited, upstream_error, internal_error
+    MCPException, auth_required, permission_denied, rate_limited, upstream_error, internal_error
 )
-from token_provider import get_valid_access_token
+from token_provider import report_invalid_token, token_scope
+from lark_http import get_session
+import rate_limiter
+import user_pool
+from singleflight import SingleFlight
+from lark_retry import LARK_RATE_LIMIT_CODES, RetryState
 
 LARK_BASE = "https://open.larksuite.com/open-apis"
 
-def _handle_lark_response(resp: requests.Response) -> Dict[str, Any]:
+# list_events 페이지 크기 (Lark 허용 범위: 50~1000)
+EVENTS_PAGE_SIZE = int(os.getenv("LARK_EVENTS_PAGE_SIZE", "500"))
+
+# 다음 페이지 prefetch 용 스레드
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lark-prefetch")
+
+# 동일 GET 합치기
+_singleflight = SingleFlight()
+
+def _handle_lark_response(resp: Union[requests.Response, httpx.Response]) -> Dict[str, Any]:
     # HTTP 레벨
     if resp.status_code == 401:
         raise auth_required("Lark token invalid or expired.")
@@ -18,10 +40,10 @@ def _handle_lark_response(resp: requests.Response) -> Dict[str, Any]:
     if resp.status_code == 429:
         raise rate_limited("Lark rate limited.")
     if 500 <= resp.status_code <= 599:
-        raise upstream_error(f"Lark upstream error: {resp.status_code}")
+        raise upstream_error(f"Lark upstream error: {resp.status_code}", {"status": resp.status_code})
 
     try:
-        data = resp.json()
+        data = orjson.loads(resp.content)
     except Exception as e:
         raise internal_error("Failed to parse Lark response JSON.", {"exception": str(e)})
 
@@ -30,6 +52,8 @@ def _handle_lark_response(resp: requests.Response) -> Dict[str, Any]:
         # code != 0 이면 Lark 내부 에러
         # code/ msg 구조는 API마다 조금 다를 수 있어 안전하게 처리
         msg = data.get("msg") or data.get("message") or "Lark API error"
+        if data.get("code") in LARK_RATE_LIMIT_CODES:
+            raise rate_limited(msg, {"lark_code": data.get("code")})
         # 인증/권한류 추정
         if "auth" in msg.lower():
             raise auth_required(msg, {"lark_code": data.get("code")})
@@ -38,19 +62,159 @@ def _handle_lark_response(resp: requests.Response) -> Dict[str, Any]:
     return data
 
 
-def get_primary_calendar_id(access_token: str) -> str:
-    # 1. 환경변수에서 먼저 확인 (수동 설정된 캘린더 ID)
-    env_calendar_id = os.getenv("LARK_CALENDAR_ID")
-    if env_calendar_id:
-        return env_calendar_id
+def _never_sent(exc: requests.RequestException) -> bool:
+    """커넥션 수립 단계에서 실패 → 요청이 서버에 도달하지 않음"""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
 
-    # 2. API로 캘린더 목록 조회
-    url = f"{LARK_BASE}/calendar/v4/calendars"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    resp = requests.get(url, headers=headers, timeout=15)
-    data = _handle_lark_response(resp)
 
-    items = (((data.get("data") or {}).get("calendar_list")) or [])
+def _rate_user_scope(access_token: str) -> Optional[str]:
+    """rate_limiter 사용자 버킷 키: 요청한 사용자 ID (다중 사용자 모드), 없으면 토큰 해시"""
+    if rate_limiter.USER_QPS <= 0:
+        return None
+    return user_pool.current_user.get() or token_scope(access_token)
+
+
+def _env_calendar_id() -> Optional[str]:
+    # 다중 사용자 모드에서는 사용자마다 primary 캘린더가 다르므로 고정 캘린더 ID 를 쓰지 않음
+    if user_pool.MULTI_USER:
+        return None
+    return os.getenv("LARK_CALENDAR_ID")
+
+
+def _singleflight_key(url: str, access_token: str, params: Optional[Dict[str, str]]) -> tuple:
+    """토큰 + URL(calendar_id 포함) + 쿼리(range, page_token) 가 같으면 같은 요청"""
+    return (url, token_scope(access_token), tuple(sorted((params or {}).items())))
+
+
+def _request(
+    method: str,
+    url: str,
+    access_token: str,
+    *,
+    idempotent: bool,
+    calendar_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Lark API 호출 진입점.
+
+    동시에 진행 중인 동일한 GET 은 singleflight 로 합쳐서 upstream 호출 1번으로 처리한다.
+    """
+    if method == "GET":
+        key = _singleflight_key(url, access_token, kwargs.get("params"))
+        return _singleflight.do(
+            key,
+            lambda: _send(method, url, access_token, idempotent=idempotent,
+                          calendar_id=calendar_id, headers=headers, **kwargs),
+        )
+    return _send(method, url, access_token, idempotent=idempotent,
+                 calendar_id=calendar_id, headers=headers, **kwargs)
+
+
+def _send(
+    method: str,
+    url: str,
+    access_token: str,
+    *,
+    idempotent: bool,
+    calendar_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Lark API 호출 + 재시도 (lark_retry 정책).
+
+    idempotent=False 인 요청은 서버가 처리하지 않은 게 확실한 경우(연결 실패, 429)에만 재시도한다.
+    재시도 포기 시 에러 details 에 retries / retry_wait_ms 를 남긴다.
+    매 시도 전에 rate_limiter 의 user 버킷 대기를 먼저 마친 뒤 app / calendar 버킷에서 토큰을 받는다.
+    """
+    headers = {**(headers or {}), "Authorization": f"Bearer {access_token}"}
+    user_scope = _rate_user_scope(access_token)
+    state = RetryState()
+    while True:
+        # 사용자 버킷 대기를 먼저 끝내고 공용(app / calendar) 버킷 예약
+        wait = rate_limiter.reserve_user(user_scope)
+        if wait > 0:
+            time.sleep(wait)
+        wait = rate_limiter.reserve(calendar_id)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            resp = get_session().request(method, url, headers=headers, **kwargs)
+        except requests.RequestException as e:
+            time.sleep(state.after_transport_error(e, idempotent or _never_sent(e)))
+            continue
+
+        try:
+            data = _handle_lark_response(resp)
+        except MCPException as exc:
+            _on_lark_error(exc, resp.status_code, access_token)
+            time.sleep(state.after_error_response(exc, resp.status_code, resp.headers, idempotent))
+            continue
+        state.succeeded()
+        return data
+
+
+def _on_lark_error(exc: MCPException, status_code: int, access_token: str) -> None:
+    """sync/async 공용: 인증 에러면 토큰에 묶인 상태를 정리"""
+    if exc.code != "LARK_AUTH_REQUIRED":
+        return
+    # 토큰이 무효 → 이 토큰으로 캐시한 캘린더 목록도 버림
+    invalidate_calendar_list(access_token)
+    if status_code == 401:
+        # 만료 전에 폐기된 토큰 → 자동 갱신 중인 토큰이면 바로 새로 받음
+        report_invalid_token(access_token)
+
+
+# -------------------- 캘린더 목록 캐시 (토큰별) --------------------
+# calendar_id 를 생략한 호출마다 /calendars 를 다시 부르지 않도록 토큰별로 목록을 기억한다.
+# 인증 에러가 나면 해당 토큰의 항목은 _request 에서 버린다.
+CALENDAR_LIST_TTL = float(os.getenv("LARK_CALENDAR_LIST_TTL", "600"))
+_CALENDAR_LIST_MAX_TOKENS = 1024
+_calendar_lists: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_calendar_lists_lock = threading.Lock()
+_calendar_list_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _cached_calendar_list(access_token: str) -> Optional[List[Dict[str, Any]]]:
+    key = token_scope(access_token)
+    with _calendar_lists_lock:
+        entry = _calendar_lists.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _calendar_lists.move_to_end(key)
+            _calendar_list_stats["hits"] += 1
+            return entry[1]
+        _calendar_list_stats["misses"] += 1
+        return None
+
+
+def _store_calendar_list(access_token: str, items: List[Dict[str, Any]]) -> None:
+    if CALENDAR_LIST_TTL <= 0:
+        return
+    key = token_scope(access_token)
+    with _calendar_lists_lock:
+        _calendar_lists[key] = (time.monotonic() + CALENDAR_LIST_TTL, items)
+        _calendar_lists.move_to_end(key)
+        while len(_calendar_lists) > _CALENDAR_LIST_MAX_TOKENS:
+            _calendar_lists.popitem(last=False)
+
+
+def invalidate_calendar_list(access_token: str) -> None:
+    with _calendar_lists_lock:
+        if _calendar_lists.pop(token_scope(access_token), None) is not None:
+            _calendar_list_stats["invalidations"] += 1
+
+
+def calendar_list_cache_stats() -> Dict[str, Any]:
+    with _calendar_lists_lock:
+        return {**_calendar_list_stats, "tokens": len(_calendar_lists), "ttl": CALENDAR_LIST_TTL}
+
+
+def _pick_primary_calendar_id(items: List[Dict[str, Any]]) -> str:
     # primary 찾기
     for cal in items:
         if cal.get("type") == "primary":
@@ -65,18 +229,91 @@ def get_primary_calendar_id(access_token: str) -> str:
     raise upstream_error("No calendar_id found from Lark. Set LARK_CALENDAR_ID in .env file.")
 
 
-def list_events(access_token: str, calendar_id: str, start_ts: int, end_ts: int) -> List[Dict[str, Any]]:
-    url = f"{LARK_BASE}/calendar/v4/calendars/{calendar_id}/events"
-    headers = {"Authorization": f"Bearer {access_token}"}
+def list_calendars(access_token: str) -> List[Dict[str, Any]]:
+    """토큰으로 접근 가능한 캘린더 목록 (토큰별 캐시)"""
+    cached = _cached_calendar_list(access_token)
+    if cached is not None:
+        return cached
+
+    url = f"{LARK_BASE}/calendar/v4/calendars"
+    data = _request("GET", url, access_token, idempotent=True, timeout=15)
+    items = (((data.get("data") or {}).get("calendar_list")) or [])
+    _store_calendar_list(access_token, items)
+    return items
+
+
+def get_primary_calendar_id(access_token: str) -> str:
+    # 1. 환경변수에서 먼저 확인 (수동 설정된 캘린더 ID, 다중 사용자 모드 제외)
+    env_calendar_id = _env_calendar_id()
+    if env_calendar_id:
+        return env_calendar_id
+
+    # 2. 캘린더 목록(캐시 또는 API)에서 primary 선택
+    return _pick_primary_calendar_id(list_calendars(access_token))
+
+
+def _event_page_params(start_ts: int, end_ts: int, page_token: Optional[str]) -> Dict[str, str]:
     params = {
         "start_time": str(start_ts),
         "end_time": str(end_ts),
-        "page_size": "200"
+        "page_size": str(EVENTS_PAGE_SIZE),
     }
-    resp = requests.get(url, headers=headers, params=params, timeout=20)
-    data = _handle_lark_response(resp)
+    if page_token:
+        params["page_token"] = page_token
+    return params
+
+
+def _parse_event_page(data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """(이번 페이지 이벤트, 다음 page_token) 반환. 마지막 페이지면 page_token=None"""
+    body = data.get("data") or {}
+    events = body.get("items") or []
+    next_token = body.get("page_token") if body.get("has_more") else None
+    return events, (next_token or None)
+
 
-    events = (((data.get("data") or {}).get("items")) or [])
+def _fetch_event_page(
+    access_token: str, calendar_id: str, start_ts: int, end_ts: int, page_token: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    url = f"{LARK_BASE}/calendar/v4/calendars/{calendar_id}/events"
+    params = _event_page_params(start_ts, end_ts, page_token)
+    data = _request(
+        "GET", url, access_token, idempotent=True, calendar_id=calendar_id, params=params, timeout=20
+    )
+    return _parse_event_page(data)
+
+
+def iter_event_pages(
+    access_token: str, calendar_id: str, start_ts: int, end_ts: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    이벤트를 페이지 단위로 yield (page_token/has_more 끝까지).
+
+    현재 페이지를 호출자에게 넘기기 전에 다음 페이지 요청을 백그라운드로 먼저 보내서,
+    호출자가 처리하는 동안 upstream 대기가 겹치도록 한다.
+    """
+    events, next_token = _fetch_event_page(access_token, calendar_id, start_ts, end_ts, None)
+    while True:
+        pending = None
+        if next_token:
+            pending = _prefetch_pool.submit(
+                _fetch_event_page, access_token, calendar_id, start_ts, end_ts, next_token
+            )
+        try:
+            yield events
+        except BaseException:
+            # 호출자가 중간에 멈추면(close/예외) prefetch도 정리
+            if pending is not None:
+                pending.cancel()
+            raise
+        if pending is None:
+            return
+        events, next_token = pending.result()
+
+
+def list_events(access_token: str, calendar_id: str, start_ts: int, end_ts: int) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    for page in iter_event_pages(access_token, calendar_id, start_ts, end_ts):
+        events.extend(page)
     return events
 
 
@@ -91,7 +328,7 @@ def create_event(
     free_busy_status: str = "busy",
 ) -> str:
     url = f"{LARK_BASE}/calendar/v4/calendars/{calendar_id}/events"
-    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
+    headers = {"Content-Type": "application/json"}
 
     payload = {
         "summary": summary,
@@ -102,8 +339,12 @@ def create_event(
         "end_time": {"timestamp": str(end_ts)},
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=20)
-    data = _handle_lark_response(resp)
+    # idempotency_key: 재시도로 같은 요청이 두 번 처리돼도 이벤트는 하나만 생성됨 → 5xx/타임아웃도 재시도 가능
+    params = {"idempotency_key": str(uuid.uuid4())}
+    data = _request(
+        "POST", url, access_token, idempotent=True, calendar_id=calendar_id,
+        headers=headers, params=params, json=payload, timeout=20,
+    )
 
     evt = (((data.get("data") or {}).get("event")) or {})
     event_id = evt.get("event_id")
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# 프로세스 전역 커넥션 풀 설정
+# - POOL_CONNECTIONS: 캐시할 호스트별 풀 개수
+# - POOL_MAXSIZE: 호스트당 유지할 keep-alive 커넥션 수
+# - POOL_BLOCK: 풀이 가득 차면 새 커넥션을 만들지 않고 대기 (호스트당 하드 리밋)
+HTTP_POOL_CONNECTIONS = int(os.getenv("LARK_HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("LARK_HTTP_POOL_MAXSIZE", "32"))
+HTTP_POOL_BLOCK = os.getenv("LARK_HTTP_POOL_BLOCK", "false").lower() in ("1", "true", "yes")
+
+# async 풀 설정 (httpx)
+# - ASYNC_MAX_CONNECTIONS: 동시에 열 수 있는 전체 커넥션 수 (초과 요청은 풀에서 대기)
+# - ASYNC_MAX_KEEPALIVE: 유휴 상태로 유지할 keep-alive 커넥션 수
+HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv("LARK_HTTP_ASYNC_MAX_CONNECTIONS", "200"))
+HTTP_ASYNC_MAX_KEEPALIVE = int(os.getenv("LARK_HTTP_ASYNC_MAX_KEEPALIVE", "50"))
+
+_session: Optional[requests.Session] = None
+_adapter: Optional[HTTPAdapter] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_closers: Set["asyncio.Task[None]"] = set()
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Lark 호출에 공용으로 쓰는 requests.Session 반환 (lazy 생성).
+
+    - 호출마다 TCP+TLS 핸드셰이크를 하지 않도록 keep-alive 커넥션을 재사용
+    - urllib3 커넥션 풀은 thread-safe 하므로 FastAPI threadpool에서 공유해도 안전
+    """
+    global _session, _adapter
+    if _session is not None:
+        return _session
+
+    with _lock:
+        if _session is None:
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+                pool_block=HTTP_POOL_BLOCK,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _adapter = adapter
+            _session = session
+    return _session
+
+
+def close_session() -> None:
+    """공용 세션과 커넥션 풀 정리 (서버 종료 시)"""
+    global _session, _adapter
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _adapter = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Lark 호출에 공용으로 쓰는 httpx.AsyncClient 반환 (lazy 생성).
+
+    이벤트 루프 하나에서 수백 개의 요청이 같은 커넥션 풀을 나눠 쓴다.
+    커넥션은 생성된 루프에 묶이므로, 루프가 바뀌면(스크립트의 asyncio.run 반복 등) 새로 만든다.
+    클라이언트는 만든 루프가 끝날 때 그 루프 안에서 닫히고(asyncio.run 은 남은 task 를 취소하고 기다림),
+    교체 시점에 이전 루프가 다른 스레드에서 아직 돌고 있으면 그 루프에서 닫도록 예약한다.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        old_client, old_loop = _async_client, _async_client_loop
+        _async_client_loop = loop
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_ASYNC_MAX_KEEPALIVE,
+            ),
+        )
+        closer = loop.create_task(_close_when_loop_ends(_async_client))
+        _async_closers.add(closer)
+        closer.add_done_callback(_async_closers.discard)
+        if old_client is not None and not old_client.is_closed and old_loop is not loop \
+                and old_loop is not None and old_loop.is_running():
+            asyncio.run_coroutine_threadsafe(old_client.aclose(), old_loop)
+    return _async_client
+
+
+async def _close_when_loop_ends(client: httpx.AsyncClient) -> None:
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        if not client.is_closed:
+            await client.aclose()
+
+
+async def aclose_async_client() -> None:
+    """공용 async 클라이언트 정리 (서버 종료 시)"""
+    global _async_client
+    client = _async_client
+    _async_client = None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    커넥션 풀 상태 (풀 사이즈 튜닝용).
+
+    hosts[*].connections_opened 가 requests 에 비해 작을수록 keep-alive 재사용이 잘 되고 있다는 뜻.
+    """
+    stats: Dict[str, Any] = {
+        "pool_connections": HTTP_POOL_CONNECTIONS,
+        "pool_maxsize": HTTP_POOL_MAXSIZE,
+        "pool_block": HTTP_POOL_BLOCK,
+        "hosts": {},
+    }
+    adapter = _adapter
+    if adapter is None:
+        return stats
+
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        try:
+            pool = pools[key]
+        except KeyError:
+            # 조회 도중 LRU에서 밀려난 풀
+            continue
+        idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+        stats["hosts"][f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            "connections_opened": pool.num_connections,
+            "requests": pool.num_requests,
+            "idle": idle,
+            "maxsize": pool.pool.maxsize if pool.pool else 0,
+        }
+    return stats
+
+
+def async_pool_stats() -> Dict[str, Any]:
+    """async 커넥션 풀 상태"""
+    stats: Dict[str, Any] = {
+        "max_connections": HTTP_ASYNC_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_ASYNC_MAX_KEEPALIVE,
+        "connections": 0,
+        "idle": 0,
+    }
+    client = _async_client
+    if client is None or client.is_closed:
+        return stats
+
+    # httpcore 내부 풀은 공개 API가 없어 방어적으로 조회
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    stats["connections"] = len(connections)
+    stats["idle"] = sum(1 for conn in connections if conn.is_idle())
+    return stats
@@ -205,7 +205,7 @@ def format_event(event):
 
     return f"• {summary}\n  📅 {start_str} ~ {end_str}"
 
-def main():
+def main(user_id=None):
     print("=" * 60)
     print("🔐 Lark OAuth 로그인")
     print("=" * 60)
@@ -248,13 +248,24 @@ def main():
 
         # 토큰을 token manager로 저장
         import lark_token_manager
-        lark_token_manager.save_tokens(
-            token_data['access_token'],
-            token_data['refresh_token'],
-            token_data['expires_in'],
-            token_data['refresh_expires_in']
-        )
-        print(f"\n💾 토큰을 .env 파일과 캐시에 저장했습니다 (자동 갱신 지원)")
+        if user_id:
+            # 다중 사용자 모드 (LARK_MULTI_USER): 사용자별 토큰 파일에 저장
+            lark_token_manager.save_user_tokens(
+                user_id,
+                token_data['access_token'],
+                token_data['refresh_token'],
+                token_data['expires_in'],
+                token_data['refresh_expires_in']
+            )
+            print(f"\n💾 사용자 '{user_id}' 토큰을 {lark_token_manager.USER_TOKEN_DIR} 에 저장했습니다 (자동 갱신 지원)")
+        else:
+            lark_token_manager.save_tokens(
+                token_data['access_token'],
+                token_data['refresh_token'],
+                token_data['expires_in'],
+                token_data['refresh_expires_in']
+            )
+            print(f"\n💾 토큰을 .env 파일과 캐시에 저장했습니다 (자동 갱신 지원)")
     else:
         print(f"⚠️  Refresh token을 받지 못했습니다. Access token만 저장합니다.")
         print(f"⚠️  토큰이 만료되면 다시 로그인해야 합니다.")
@@ -322,4 +333,7 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Lark OAuth 로그인")
+    parser.add_argument("--user", help="다중 사용자 모드(LARK_MULTI_USER)에서 이 토큰을 쓸 사용자 ID (X-Lark-User 헤더 값)")
+    main(parser.parse_args().user)
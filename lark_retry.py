@@ -0,0 +1,136 @@
+from __future__ import annotations
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from errors import MCPException, upstream_error
+
+# Lark 호출 재시도 정책 (sync/async 클라이언트 공용)
+# - 지수 백오프 + full jitter
+# - Retry-After / x-ogw-ratelimit-reset 헤더가 있으면 그 시간만큼 대기
+# - 호출 단위 예산: 최대 재시도 횟수 + 누적 대기 시간
+RETRY_MAX_RETRIES = int(os.getenv("LARK_RETRY_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("LARK_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("LARK_RETRY_MAX_DELAY", "8"))
+RETRY_BUDGET_SECONDS = float(os.getenv("LARK_RETRY_BUDGET_SECONDS", "15"))
+
+# HTTP 200 이지만 envelope code 로 내려오는 Lark 빈도 제한 에러
+LARK_RATE_LIMIT_CODES = {99991400}
+
+
+@dataclass
+class RetryState:
+    """호출 1건의 재시도 예산과 사용량"""
+    max_retries: int = RETRY_MAX_RETRIES
+    budget_seconds: float = RETRY_BUDGET_SECONDS
+    retries: int = 0
+    waited: float = 0.0
+    last_status: Optional[int] = field(default=None)
+
+    def next_delay(self, retry_after: Optional[float]) -> Optional[float]:
+        """다음 재시도까지 대기할 시간. 예산을 넘으면 None (재시도 포기)"""
+        if self.retries >= self.max_retries:
+            return None
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** self.retries)))
+        if self.waited + delay > self.budget_seconds:
+            return None
+        return delay
+
+    def record(self, delay: float) -> None:
+        self.retries += 1
+        self.waited += delay
+        _stats_add(retries=1, wait_seconds=delay)
+
+    def details(self) -> Dict[str, Any]:
+        return {"retries": self.retries, "retry_wait_ms": int(self.waited * 1000)}
+
+    def after_transport_error(self, exc: Exception, retryable: bool) -> float:
+        """전송 실패 → 다음 시도까지 대기할 시간. 재시도하지 않으면 upstream_error"""
+        delay = self.next_delay(None) if retryable else None
+        if delay is None:
+            if retryable:
+                record_gave_up()
+            raise upstream_error("Lark request failed.", {"exception": str(exc), **self.details()})
+        self.record(delay)
+        return delay
+
+    def after_error_response(
+        self, exc: MCPException, status_code: int, headers: Mapping[str, str], idempotent: bool
+    ) -> float:
+        """에러 응답 → 다음 시도까지 대기할 시간. 재시도하지 않으면 details 를 붙여 exc 를 그대로 raise"""
+        retryable = is_retryable(status_code, exc.code, idempotent)
+        delay = self.next_delay(retry_after_seconds(headers)) if retryable else None
+        if delay is None:
+            if retryable:
+                record_gave_up()
+            exc.details = {**(exc.details or {}), **self.details()}
+            raise exc
+        self.record(delay)
+        return delay
+
+    def succeeded(self) -> None:
+        """재시도 끝에 성공한 호출도 통계에 남김"""
+        if self.retries:
+            _stats_add(recovered=1, recovered_retries=self.retries)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Retry-After(초 또는 HTTP date) 또는 Lark 의 x-ogw-ratelimit-reset(초) 헤더 해석"""
+    value = headers.get("Retry-After") or headers.get("x-ogw-ratelimit-reset")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(status_code: int, error_code: str, idempotent: bool) -> bool:
+    """
+    - 429 / Lark 빈도 제한 코드(LARK_RATE_LIMITED): 요청이 처리되지 않았으므로 항상 재시도
+    - 5xx: 처리됐을 수도 있으므로 멱등 요청만 재시도
+    """
+    if error_code == "LARK_RATE_LIMITED":
+        return True
+    if 500 <= status_code <= 599:
+        return idempotent
+    return False
+
+
+# -------------------- 누적 통계 (/metrics) --------------------
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {"retries": 0, "gave_up": 0, "recovered": 0, "recovered_retries": 0, "wait_seconds": 0.0}
+
+
+def _stats_add(**deltas: float) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def record_gave_up() -> None:
+    _stats_add(gave_up=1)
+
+
+def retry_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {
+            "max_retries": RETRY_MAX_RETRIES,
+            "budget_seconds": RETRY_BUDGET_SECONDS,
+            "retries": int(_stats["retries"]),
+            "gave_up": int(_stats["gave_up"]),
+            "recovered": int(_stats["recovered"]),
+            "recovered_retries": int(_stats["recovered_retries"]),
+            "wait_seconds": round(_stats["wait_seconds"], 3),
+        }
@@ -13,10 +13,11 @@ User Token 대신 Tenant Access Token 방식 사용:
 """
 import os
 import json
-import requests
 from pathlib import Path
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from lark_http import get_session
+from token_store import write_atomic
 
 load_dotenv()
 
@@ -36,7 +37,7 @@ def get_tenant_access_token():
         "app_secret": LARK_APP_SECRET
     }
 
-    response = requests.post(url, json=payload)
+    response = get_session().post(url, json=payload, timeout=10)
     result = response.json()
 
     if result.get('code') == 0:
@@ -48,15 +49,25 @@ def get_tenant_access_token():
         raise Exception(f"Tenant token 발급 실패: {result}")
 
 
-def load_cached_token():
-    """캐시된 토큰 불러오기"""
+def load_token_data():
+    """캐시 파일 내용 (만료 여부와 관계없이, 없거나 깨졌으면 None)"""
     if not TOKEN_CACHE_FILE.exists():
         return None
 
     try:
         with open(TOKEN_CACHE_FILE, 'r', encoding='utf-8') as f:
-            token_data = json.load(f)
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_cached_token():
+    """캐시된 토큰 불러오기"""
+    token_data = load_token_data()
+    if not token_data:
+        return None
 
+    try:
         expires_at = datetime.fromisoformat(token_data['expires_at'])
 
         # 아직 유효한지 확인 (5분 여유)
@@ -70,35 +81,25 @@ def load_cached_token():
 
 def save_token(token, expires_in):
     """토큰 캐시 저장"""
-    TOKEN_CACHE_FILE.parent.mkdir(exist_ok=True)
-
     token_data = {
         'token': token,
         'expires_at': (datetime.now() + timedelta(seconds=expires_in - 300)).isoformat(),  # 5분 여유
         'updated_at': datetime.now().isoformat()
     }
 
-    with open(TOKEN_CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(token_data, f, indent=2)
+    # 여러 워커가 동시에 저장해도 읽는 쪽은 항상 완성된 파일만 보도록 원자적 교체
+    write_atomic(TOKEN_CACHE_FILE, json.dumps(token_data, indent=2))
 
 
 def get_valid_tenant_token():
-    """유효한 Tenant Access Token 반환 (필요시 자동 발급/갱신)"""
-    # 1. 캐시에서 먼저 확인
-    cached_token = load_cached_token()
-    if cached_token:
-        return cached_token
-
-    # 2. 새로 발급
-    print("🔄 Tenant Access Token 발급 중...")
-    token_data = get_tenant_access_token()
-
-    # 3. 캐시 저장
-    save_token(token_data['token'], token_data['expires_in'])
-
-    print(f"✅ Tenant Access Token 발급 완료 (유효기간: {token_data['expires_in']/3600:.1f}시간)")
-
-    return token_data['token']
+    """
+    유효한 Tenant Access Token 반환 (필요시 자동 발급/갱신)
+
+    토큰은 token_provider 가 메모리에 들고 만료 전에 백그라운드에서 갱신한다.
+    (파일은 시작할 때 한 번만 읽고, 갱신할 때 저장)
+    """
+    from token_provider import tenant_tokens  # token_provider 가 이 모듈을 import → 순환 방지
+    return tenant_tokens.get()
 
 
 def main():
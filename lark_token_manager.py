@@ -5,13 +5,14 @@ Lark Token 자동 갱신 관리자
 - Access token이 만료되면 refresh token으로 자동 갱신
 - Refresh token도 만료되면 재로그인 안내
 """
+import hashlib
 import os
-import json
 import time
-import requests
 from pathlib import Path
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from lark_http import get_session
+from token_store import TokenStore, write_atomic
 
 # .env 파일 로드
 load_dotenv()
@@ -22,24 +23,26 @@ LARK_APP_SECRET = os.getenv('LARK_APP_SECRET')
 # 토큰 정보 저장 파일
 TOKEN_CACHE_FILE = Path.home() / '.daily-focus' / 'lark_tokens.json'
 
+# 여러 워커가 공유 (원자적 쓰기 + mtime 캐시 + 파일 잠금)
+token_store = TokenStore(TOKEN_CACHE_FILE)
+
+# 다중 사용자 모드(user_pool)에서 사용자별 토큰 파일을 두는 디렉터리
+USER_TOKEN_DIR = Path(os.getenv('LARK_USER_TOKEN_DIR') or Path.home() / '.daily-focus' / 'users').expanduser()
+
 
 def load_tokens():
     """저장된 토큰 정보 불러오기"""
-    if not TOKEN_CACHE_FILE.exists():
-        return None
+    return token_store.read()
 
-    try:
-        with open(TOKEN_CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return None
 
+def refresh_lock():
+    """토큰 갱신 구간 잠금 (워커 중 하나만 refresh token 을 사용하도록)"""
+    return token_store.lock()
 
-def save_tokens(access_token, refresh_token, expires_in, refresh_expires_in):
-    """토큰 정보 저장"""
-    TOKEN_CACHE_FILE.parent.mkdir(exist_ok=True)
 
-    token_data = {
+def make_token_data(access_token, refresh_token, expires_in, refresh_expires_in):
+    """토큰 파일에 저장하는 형식"""
+    return {
         'access_token': access_token,
         'refresh_token': refresh_token,
         'expires_at': (datetime.now() + timedelta(seconds=expires_in - 300)).isoformat(),  # 5분 여유
@@ -47,8 +50,12 @@ def save_tokens(access_token, refresh_token, expires_in, refresh_expires_in):
         'updated_at': datetime.now().isoformat()
     }
 
-    with open(TOKEN_CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(token_data, f, indent=2)
+
+def save_tokens(access_token, refresh_token, expires_in, refresh_expires_in):
+    """토큰 정보 저장"""
+    token_data = make_token_data(access_token, refresh_token, expires_in, refresh_expires_in)
+
+    token_store.write(token_data)
 
     # .env 파일도 업데이트
     update_env_file(access_token)
@@ -56,6 +63,20 @@ def save_tokens(access_token, refresh_token, expires_in, refresh_expires_in):
     return token_data
 
 
+def user_token_store(user_id):
+    """사용자별 토큰 파일 (파일 이름은 user_id 해시 → 경로 조작 불가)"""
+    name = hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:32]
+    return TokenStore(USER_TOKEN_DIR / f'{name}.json')
+
+
+def save_user_tokens(user_id, access_token, refresh_token, expires_in, refresh_expires_in):
+    """다중 사용자 모드용 토큰 저장 (.env 는 건드리지 않음)"""
+    token_data = make_token_data(access_token, refresh_token, expires_in, refresh_expires_in)
+    token_data['user_id'] = user_id
+    user_token_store(user_id).write(token_data)
+    return token_data
+
+
 def update_env_file(access_token):
     """env 파일의 LARK_USER_TOKEN 업데이트"""
     env_file = Path(__file__).parent.parent / '.env'
@@ -78,8 +99,7 @@ def update_env_file(access_token):
     if not updated:
         lines.append(token_line)
 
-    with open(env_file, 'w', encoding='utf-8') as f:
-        f.writelines(lines)
+    write_atomic(env_file, ''.join(lines), mode=env_file.stat().st_mode & 0o777)
 
 
 def refresh_access_token(refresh_token):
@@ -93,7 +113,7 @@ def refresh_access_token(refresh_token):
         "refresh_token": refresh_token
     }
 
-    response = requests.post(url, json=payload)
+    response = get_session().post(url, json=payload, timeout=10)
     result = response.json()
 
     if result.get('code') == 0:
@@ -145,16 +165,24 @@ def get_valid_token():
     print("🔄 Refresh token으로 갱신 중...")
 
     try:
-        # Refresh token으로 새 토큰 발급
-        new_tokens = refresh_access_token(token_data['refresh_token'])
-
-        # 새 토큰 저장
-        save_tokens(
-            new_tokens['access_token'],
-            new_tokens['refresh_token'],
-            new_tokens['expires_in'],
-            new_tokens['refresh_expires_in']
-        )
+        with refresh_lock():
+            # 잠금을 기다리는 동안 다른 프로세스가 이미 갱신했으면 그 토큰 사용
+            latest = load_tokens() or token_data
+            if latest['access_token'] != token_data['access_token'] \
+                    and datetime.now() < datetime.fromisoformat(latest['expires_at']):
+                print("✅ 다른 프로세스가 갱신한 토큰 사용")
+                return latest['access_token']
+
+            # Refresh token으로 새 토큰 발급
+            new_tokens = refresh_access_token(latest['refresh_token'])
+
+            # 새 토큰 저장
+            save_tokens(
+                new_tokens['access_token'],
+                new_tokens['refresh_token'],
+                new_tokens['expires_in'],
+                new_tokens['refresh_expires_in']
+            )
 
         print(f"✅ 토큰 갱신 완료 (다음 만료: {datetime.now() + timedelta(seconds=new_tokens['expires_in'])})")
 
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from user_pool import MULTI_USER
+
+# 클라이언트 측 token bucket (Lark 429를 받기 전에 로컬에서 버스트를 평탄화)
+# - app 버킷: 앱 전체 호출량 (Lark 캘린더 API 기본 쿼터 50 QPS 기준)
+# - calendar 버킷: 캘린더별 호출량
+# - user 버킷: 사용자별 호출량 (다중 사용자 모드에서 한 사용자가 app 버킷을 다 쓰지 않도록, 그 모드에서는 기본으로 켜짐)
+# QPS 를 0 으로 두면 해당 버킷 비활성화
+APP_QPS = float(os.getenv("LARK_RATE_APP_QPS", "50"))
+APP_BURST = float(os.getenv("LARK_RATE_APP_BURST", "50"))
+CALENDAR_QPS = float(os.getenv("LARK_RATE_CALENDAR_QPS", "10"))
+CALENDAR_BURST = float(os.getenv("LARK_RATE_CALENDAR_BURST", "20"))
+USER_QPS = float(os.getenv("LARK_RATE_USER_QPS", "10" if MULTI_USER else "0"))
+USER_BURST = float(os.getenv("LARK_RATE_USER_BURST", "20"))
+MAX_CALENDAR_BUCKETS = 10000
+MAX_USER_BUCKETS = 10000
+
+
+class TokenBucket:
+    """
+    예약(reservation) 방식 token bucket.
+
+    reserve()는 토큰을 즉시 차감하고(음수 허용) 토큰이 생길 때까지 기다려야 할 시간을 돌려준다.
+    대기 자체는 호출자가 하므로 sync(time.sleep)/async(asyncio.sleep) 양쪽에서 같이 쓸 수 있다.
+    """
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated", "_lock")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+_lock = threading.Lock()
+_app_bucket: Optional[TokenBucket] = TokenBucket(APP_QPS, APP_BURST) if APP_QPS > 0 else None
+_calendar_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+_user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+_stats: Dict[str, Dict[str, float]] = {
+    "app": {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0},
+    "calendar": {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0},
+    "user": {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0},
+}
+
+
+def _keyed_bucket(
+    buckets: "OrderedDict[str, TokenBucket]", key: str, rate: float, burst: float, max_buckets: int
+) -> TokenBucket:
+    with _lock:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            buckets[key] = bucket
+            if len(buckets) > max_buckets:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+
+def _calendar_bucket(calendar_id: str) -> Optional[TokenBucket]:
+    if CALENDAR_QPS <= 0:
+        return None
+    return _keyed_bucket(_calendar_buckets, calendar_id, CALENDAR_QPS, CALENDAR_BURST, MAX_CALENDAR_BUCKETS)
+
+
+def _record(kind: str, wait: float) -> None:
+    with _lock:
+        stats = _stats[kind]
+        stats["acquired"] += 1
+        if wait > 0:
+            stats["waited"] += 1
+            stats["wait_seconds"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+
+
+def reserve_user(user_scope: Optional[str]) -> float:
+    """
+    사용자 버킷에서 토큰 1개 예약, 기다려야 할 시간(초) 반환.
+
+    reserve() 보다 먼저 부르고 이 대기를 끝낸 뒤에 reserve() 를 부른다.
+    한도를 넘긴 사용자가 기다리는 동안에는 app / calendar 버킷을 건드리지 않으므로 다른 사용자 몫이 줄지 않는다.
+    """
+    if not user_scope or USER_QPS <= 0:
+        return 0.0
+    wait = _keyed_bucket(_user_buckets, user_scope, USER_QPS, USER_BURST, MAX_USER_BUCKETS).reserve()
+    _record("user", wait)
+    return wait
+
+
+def reserve(calendar_id: Optional[str] = None) -> float:
+    """app(+calendar) 버킷에서 토큰 1개씩 예약하고, 호출 전에 기다려야 할 시간(초) 반환"""
+    wait = 0.0
+    if _app_bucket is not None:
+        app_wait = _app_bucket.reserve()
+        _record("app", app_wait)
+        wait = app_wait
+    if calendar_id:
+        bucket = _calendar_bucket(calendar_id)
+        if bucket is not None:
+            cal_wait = bucket.reserve()
+            _record("calendar", cal_wait)
+            wait = max(wait, cal_wait)
+    return wait
+
+
+def limiter_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "app_qps": APP_QPS,
+            "calendar_qps": CALENDAR_QPS,
+            "user_qps": USER_QPS,
+            "calendar_buckets": len(_calendar_buckets),
+            "user_buckets": len(_user_buckets),
+            **{
+                kind: {
+                    "acquired": int(s["acquired"]),
+                    "waited": int(s["waited"]),
+                    "wait_seconds": round(s["wait_seconds"], 3),
+                    "max_wait_seconds": round(s["max_wait_seconds"], 3),
+                }
+                for kind, s in _stats.items()
+            },
+        }
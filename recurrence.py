@@ -0,0 +1,322 @@
+from __future__ import annotations
+import os
+import threading
+from calendar import monthrange
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from event_normalize import Event
+
+# 반복 일정(RRULE) 로컬 전개
+# - Lark 는 반복 일정을 master 이벤트 1개(recurrence 에 RRULE) + 예외 회차(is_exception) 로 돌려준다.
+# - 조회 구간 안의 회차를 master 의 시간대 기준으로 직접 만들어서 일반 이벤트처럼 다룬다.
+#   (빈 시간 찾기/충돌 계산이 반복 회의를 빠뜨리거나 두 번 세지 않도록)
+# - 예외 회차는 event_id 뒤의 원래 시작 시각(<uid>_<timestamp>)으로 매칭해 해당 회차를 대체/삭제한다.
+# - 회차 시각은 (event_id, 규칙, 조회 구간) 별로 메모해서 매 조회마다 다시 전개하지 않는다.
+#
+# 지원: FREQ=DAILY/WEEKLY/MONTHLY/YEARLY, INTERVAL, COUNT, UNTIL, BYDAY, BYMONTHDAY, BYMONTH, WKST
+# 그 밖의 규칙(BYSETPOS, BYHOUR 등)은 전개하지 않고 master 1개로 취급한다.
+RECURRENCE_CACHE_SIZE = int(os.getenv("LARK_RECURRENCE_CACHE_SIZE", "4096"))
+RECURRENCE_MAX_INSTANCES = int(os.getenv("LARK_RECURRENCE_MAX_INSTANCES", "1000"))
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_SUPPORTED_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "BYMONTH", "WKST"}
+_PERIOD_DAYS = {"DAILY": 1, "WEEKLY": 7}
+
+
+class Rule:
+    __slots__ = ("freq", "interval", "count", "until", "byday", "bymonthday", "bymonth", "wkst")
+
+    def __init__(self, freq: str, interval: int = 1, count: Optional[int] = None, until: Optional[str] = None,
+                 byday: Tuple[Tuple[Optional[int], int], ...] = (), bymonthday: Tuple[int, ...] = (),
+                 bymonth: Tuple[int, ...] = (), wkst: int = 0):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = byday
+        self.bymonthday = bymonthday
+        self.bymonth = bymonth
+        self.wkst = wkst
+
+
+def _parse_byday(value: str) -> Tuple[Optional[int], int]:
+    # "WE" → (None, 2), "-1FR" → (-1, 4), "2TU" → (2, 1)
+    ordinal, weekday = value[:-2], value[-2:]
+    return (int(ordinal) if ordinal else None), _WEEKDAYS[weekday]
+
+
+def parse_rrule(rule: str) -> Optional[Rule]:
+    """RRULE 문자열 → Rule. 지원하지 않거나 잘못된 규칙이면 None"""
+    rule = rule.strip()
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[6:]
+    parts: Dict[str, str] = {}
+    for part in rule.split(";"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep:
+            return None
+        parts[key.strip().upper()] = value.strip().upper()
+
+    freq = parts.get("FREQ")
+    if freq not in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY") or not parts.keys() <= _SUPPORTED_PARTS:
+        return None
+    try:
+        parsed = Rule(
+            freq=freq,
+            interval=int(parts.get("INTERVAL", "1")),
+            count=int(parts["COUNT"]) if "COUNT" in parts else None,
+            until=parts.get("UNTIL") or None,
+            byday=tuple(_parse_byday(v) for v in parts["BYDAY"].split(",")) if parts.get("BYDAY") else (),
+            bymonthday=tuple(int(v) for v in parts["BYMONTHDAY"].split(",")) if parts.get("BYMONTHDAY") else (),
+            bymonth=tuple(sorted(int(v) for v in parts["BYMONTH"].split(","))) if parts.get("BYMONTH") else (),
+            wkst=_WEEKDAYS[parts.get("WKST", "MO")],
+        )
+    except (KeyError, ValueError):
+        return None
+
+    if parsed.interval < 1 or (parsed.count is not None and parsed.count < 1):
+        return None
+    if any(not 1 <= m <= 12 for m in parsed.bymonth) or any(not 1 <= abs(d) <= 31 for d in parsed.bymonthday):
+        return None
+    has_ordinal = any(ordinal is not None for ordinal, _ in parsed.byday)
+    if has_ordinal and freq in ("DAILY", "WEEKLY"):
+        return None
+    # 연 단위 n번째 요일(BYDAY 만 있고 BYMONTH 없음)은 지원하지 않음
+    if freq == "YEARLY" and parsed.byday and not parsed.bymonth:
+        return None
+    return parsed
+
+
+def _zone(name: Optional[str]) -> tzinfo:
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
+
+def _until_ts(value: str, tz: tzinfo) -> int:
+    """UNTIL (포함) → unix ts. 날짜만 있으면 그 날 끝까지"""
+    if len(value) == 8:
+        day = datetime.strptime(value, "%Y%m%d").date()
+        return int(datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz).timestamp()) - 1
+    if value.endswith("Z"):
+        return int(datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).timestamp())
+    return int(datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=tz).timestamp())
+
+
+def _month_days(rule: Rule, year: int, month: int, anchor: date) -> List[date]:
+    ndays = monthrange(year, month)[1]
+    by_monthday: Set[int] = set()
+    for md in rule.bymonthday:
+        day = md if md > 0 else ndays + md + 1
+        if 1 <= day <= ndays:
+            by_monthday.add(day)
+
+    by_weekday: Set[int] = set()
+    for ordinal, weekday in rule.byday:
+        first = (weekday - date(year, month, 1).weekday()) % 7 + 1
+        days = list(range(first, ndays + 1, 7))
+        if ordinal is None:
+            by_weekday.update(days)
+        elif 1 <= abs(ordinal) <= len(days):
+            by_weekday.add(days[ordinal - 1 if ordinal > 0 else ordinal])
+
+    if rule.bymonthday and rule.byday:
+        days = by_monthday & by_weekday
+    elif rule.bymonthday:
+        days = by_monthday
+    elif rule.byday:
+        days = by_weekday
+    else:
+        # 시작일과 같은 날짜 (그 날짜가 없는 달은 건너뜀)
+        days = {anchor.day} if anchor.day <= ndays else set()
+    return [date(year, month, day) for day in sorted(days)]
+
+
+def _candidate_dates(rule: Rule, anchor: date, begin: date, last: date) -> Iterator[date]:
+    """begin 이후 규칙에 맞는 날짜 (시간순). anchor 는 시작일(기본 요일/날짜/월 기준)"""
+    weekdays = {weekday for _, weekday in rule.byday}
+
+    if rule.freq == "DAILY":
+        step = timedelta(days=rule.interval)
+        day = begin
+        while day <= last:
+            if (not weekdays or day.weekday() in weekdays) \
+                    and (not rule.bymonth or day.month in rule.bymonth) \
+                    and (not rule.bymonthday or day in _month_days(rule, day.year, day.month, anchor)):
+                yield day
+            day += step
+
+    elif rule.freq == "WEEKLY":
+        order = sorted(weekdays or {anchor.weekday()}, key=lambda wd: (wd - rule.wkst) % 7)
+        week_start = begin - timedelta(days=(begin.weekday() - rule.wkst) % 7)
+        step = timedelta(weeks=rule.interval)
+        while week_start <= last:
+            for weekday in order:
+                day = week_start + timedelta(days=(weekday - rule.wkst) % 7)
+                if begin <= day <= last and (not rule.bymonth or day.month in rule.bymonth):
+                    yield day
+            week_start += step
+
+    else:
+        year, month = begin.year, begin.month
+        while date(year, month, 1) <= last:
+            if rule.freq == "MONTHLY":
+                months = [month] if not rule.bymonth or month in rule.bymonth else []
+            else:
+                months = list(rule.bymonth or (anchor.month,))
+            for m in months:
+                for day in _month_days(rule, year, m, anchor):
+                    if begin <= day <= last:
+                        yield day
+            if rule.freq == "MONTHLY":
+                month += rule.interval
+                year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+            else:
+                year += rule.interval
+                month = 1
+
+
+def occurrences(rule_str: str, start_ts: int, duration: int, tz_name: Optional[str],
+                window_start: int, window_end: int) -> Tuple[int, ...]:
+    """조회 구간과 겹치는 회차들의 시작 ts (규칙을 해석할 수 없으면 master 자신만)"""
+    rule = parse_rrule(rule_str)
+    if rule is None:
+        return (start_ts,) if start_ts < window_end and start_ts + duration > window_start else ()
+
+    tz = _zone(tz_name)
+    dtstart = datetime.fromtimestamp(start_ts, tz)
+    until = _until_ts(rule.until, tz) if rule.until else None
+    last_ts = window_end if until is None else min(window_end, until)
+    if last_ts < start_ts:
+        return ()
+    anchor = dtstart.date()
+    last = datetime.fromtimestamp(last_ts, tz).date()
+
+    # COUNT 가 없으면 조회 구간 이전 주기는 통째로 건너뜀 (매주 반복 회의를 몇 년치 돌지 않도록)
+    begin = anchor
+    period_days = _PERIOD_DAYS.get(rule.freq)
+    if rule.count is None and period_days:
+        earliest = datetime.fromtimestamp(window_start - duration, tz).date() - timedelta(days=1)
+        stride = period_days * rule.interval
+        skip = max(0, (earliest - anchor).days // stride)
+        begin = anchor + timedelta(days=skip * stride)
+
+    local_time = dtstart.time()
+    found: List[int] = []
+    seen = 0
+    for day in _candidate_dates(rule, anchor, begin, last):
+        ts = int(datetime.combine(day, local_time, tzinfo=tz).timestamp())
+        if ts < start_ts:
+            continue
+        seen += 1
+        if rule.count is not None and seen > rule.count:
+            break
+        if (until is not None and ts > until) or ts >= window_end:
+            break
+        if ts + duration > window_start:
+            found.append(ts)
+            if len(found) >= RECURRENCE_MAX_INSTANCES:
+                break
+    return tuple(found)
+
+
+class _OccurrenceMemo:
+    """(event_id, 규칙, 시작/길이, 시간대, 조회 구간) → 회차 시작 ts 튜플 (LRU)"""
+
+    def __init__(self, max_entries: int = RECURRENCE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[int, ...]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, event: Event, window_start: int, window_end: int) -> Tuple[int, ...]:
+        duration = event.end_ts - event.start_ts
+        key = (event.event_id, event.recurrence, event.start_ts, duration,
+               event.timezone, window_start, window_end)
+        with self._lock:
+            found = self._entries.get(key)
+            if found is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return found
+            self._stats["misses"] += 1
+
+        found = occurrences(event.recurrence, event.start_ts, duration, event.timezone,
+                            window_start, window_end)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = found
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), **self._stats}
+
+
+_memo = _OccurrenceMemo()
+
+
+def recurrence_stats() -> Dict[str, Any]:
+    return _memo.stats()
+
+
+def _uid(event_id: str) -> str:
+    # "<uid>_0" (master) / "<uid>_1764723600" (회차) → "<uid>"
+    uid, sep, suffix = event_id.rpartition("_")
+    return uid if sep and suffix.isdigit() else event_id
+
+
+def _original_ts(event_id: str) -> Optional[int]:
+    _, sep, suffix = event_id.rpartition("_")
+    if sep and suffix.isdigit() and suffix != "0":
+        return int(suffix)
+    return None
+
+
+def expand_recurring(events: List[Event], start_ts: int, end_ts: int) -> List[Event]:
+    """
+    정규화된 이벤트 목록의 반복 master 를 [start_ts, end_ts) 안의 회차들로 바꾼다.
+
+    - 회차: master 복사본 + event_id "<uid>_<회차 시작 ts>", recurring_event_id = master event_id
+    - 예외 회차(is_exception)나 이미 받은 회차와 같은 시각의 회차는 만들지 않는다.
+    - status=cancelled 인 예외(증분 동기화 스토어의 삭제 표식)는 해당 회차를 지우기만 하고 결과에는 넣지 않는다.
+    입력 Event 는 캐시/single-flight 가 공유하므로 변경하지 않는다.
+    """
+    if not any(e.recurrence or e.status == "cancelled" for e in events):
+        return events
+
+    masters: List[Event] = []
+    taken: Set[Tuple[str, int]] = set()
+    result: List[Event] = []
+    for e in events:
+        if e.recurrence and not e.is_exception and e.start_ts:
+            masters.append(e)
+            continue
+        parent = e.recurring_event_id
+        if parent or e.is_exception:
+            uid = _uid(parent or e.event_id)
+            original = _original_ts(e.event_id)
+            taken.add((uid, e.start_ts if original is None else original))
+        if e.status != "cancelled":
+            result.append(e)
+
+    for master in masters:
+        uid = _uid(master.event_id)
+        duration = master.end_ts - master.start_ts
+        for ts in _memo.get(master, start_ts, end_ts):
+            if (uid, ts) in taken:
+                continue
+            result.append(master.occurrence(f"{uid}_{ts}", ts, ts + duration))
+
+    result.sort(key=lambda e: e.start_ts)
+    return result
@@ -19,22 +19,24 @@ class MCPResponse(BaseModel):
 
 
 # ---------- Tool #1: list events ----------
+EventField = Literal[
+    "event_id", "summary", "start_ts", "end_ts", "is_all_day", "location", "organizer",
+    "recurrence", "is_exception", "recurring_event_id", "timezone", "calendar_id",
+]
+
+
 class ListEventsInput(BaseModel):
     range_start_ts: int = Field(ge=0)
     range_end_ts: int = Field(ge=0)
     calendar_id: Optional[str] = None
-
-    model_config = ConfigDict(extra="forbid")
-
-
-class CalendarEvent(BaseModel):
-    event_id: str
-    summary: str
-    start_ts: int
-    end_ts: int
-    is_all_day: bool
-    location: Optional[str] = None
-    organizer: Optional[str] = None
+    # 여러 캘린더(본인 + 공유/팀)를 한 번에 조회. 지정하면 calendar_id 는 무시
+    calendar_ids: Optional[List[str]] = Field(default=None, min_length=1, max_length=50)
+    # 지정하면 한 번에 모아서 응답하는 대신 이벤트를 받는 대로 NDJSON / SSE 로 흘려보냄
+    stream: Optional[Literal["ndjson", "sse"]] = None
+    # 응답 이벤트에 남길 필드 (없으면 전체). calendar_ids 조회면 calendar_id 는 항상 포함
+    fields: Optional[List[EventField]] = Field(default=None, min_length=1)
+    # 이전 응답의 version. 내용이 같으면 events 없이 not_modified=true 만 응답
+    if_none_match: Optional[str] = Field(default=None, max_length=64)
 
     model_config = ConfigDict(extra="forbid")
 
@@ -49,7 +51,7 @@ class FocusBlock(BaseModel):
 
 class CreateFocusBlocksInput(BaseModel):
     title: str = Field(min_length=1, max_length=120)
-    blocks: List[FocusBlock] = Field(min_length=1, max_length=10)
+    blocks: List[FocusBlock] = Field(min_length=1, max_length=500)
     description: Optional[str] = Field(default=None, max_length=2000)
     calendar_id: Optional[str] = None
     visibility: Optional[Literal["private", "public"]] = None
@@ -63,3 +65,33 @@ class HealthCheckInput(BaseModel):
     calendar_id: Optional[str] = None
 
     model_config = ConfigDict(extra="forbid")
+
+
+# ---------- Tool #4: find free slots ----------
+HHMM_PATTERN = r"^([01]\d|2[0-3]):[0-5]\d$"
+
+
+class BreakWindow(BaseModel):
+    start: str = Field(pattern=HHMM_PATTERN)
+    end: str = Field(pattern=HHMM_PATTERN)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class FindFreeSlotsInput(BaseModel):
+    range_start_ts: int = Field(ge=0)
+    range_end_ts: int = Field(ge=0)
+    calendar_id: Optional[str] = None
+    # 여러 캘린더(팀)의 공통 빈 시간. 지정하면 calendar_id 는 무시
+    calendar_ids: Optional[List[str]] = Field(default=None, min_length=1, max_length=50)
+    timezone: str = "Asia/Seoul"
+    work_start: str = Field(default="10:00", pattern=HHMM_PATTERN)
+    work_end: str = Field(default="19:00", pattern=HHMM_PATTERN)
+    breaks: List[BreakWindow] = Field(
+        default_factory=lambda: [BreakWindow(start="11:00", end="12:00")], max_length=10
+    )
+    min_block_min: int = Field(default=30, ge=5, le=1440)
+    weekdays_only: bool = True
+
+    model_config = ConfigDict(extra="forbid")
+
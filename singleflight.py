@@ -0,0 +1,78 @@
+from __future__ import annotations
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# 동일한 요청이 동시에 여러 개 들어오면 upstream 호출은 하나만 하고 결과를 모두에게 나눠준다.
+# (여러 에이전트가 같은 캘린더를 동시에 열 때 같은 GET 이 중복으로 나가는 것을 막음)
+#
+# ⚠️ 결과 객체는 대기자 모두가 공유하므로 호출자는 결과를 변경하면 안 된다.
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+
+def _record(coalesced: bool) -> None:
+    with _stats_lock:
+        _stats["calls"] += 1
+        if coalesced:
+            _stats["coalesced"] += 1
+        else:
+            _stats["executions"] += 1
+
+
+def singleflight_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        calls = _stats["calls"]
+        return {
+            **_stats,
+            # 전체 호출 중 upstream 없이 다른 호출 결과를 받은 비율
+            "coalesce_ratio": round(_stats["coalesced"] / calls, 3) if calls else 0.0,
+        }
+
+
+class SingleFlight:
+    """스레드용 (sync 클라이언트)"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+        _record(coalesced=not leader)
+
+        if not leader:
+            return fut.result()
+
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return fut.result()
+
+
+class AsyncSingleFlight:
+    """이벤트 루프용 (async 클라이언트)"""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        _record(coalesced=task is not None)
+        if task is None:
+            # 별도 task 로 실행 → 처음 요청한 쪽이 취소돼도 나머지 대기자는 결과를 받는다
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
@@ -0,0 +1,103 @@
+"""
+event_cache 구간 잘라내기 테스트: 캐시 적중(넓은 window 의 일부) 결과가 같은 구간을 upstream 에서
+바로 조회한 결과(cold fetch)와 같아야 한다.
+
+    python -m pytest -q test_event_cache.py
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import app
+import lark_async_client
+from event_cache import event_cache
+
+DAY = 86400
+BASE = 1767193200  # 2026-01-01 00:00 KST
+KST = ZoneInfo("Asia/Seoul")
+
+RAW_EVENTS = [
+    # 날짜만 있는 종일 일정 (timestamp 없음 → 시작일 0시 ~ 종료일 다음 날 0시 KST 로 정규화)
+    {"event_id": "allday", "summary": "휴가", "is_all_day": True,
+     "start_time": {"date": "2026-01-03"}, "end_time": {"date": "2026-01-04"}},
+    {"event_id": "before", "summary": "지난 회의",
+     "start_time": {"timestamp": str(BASE + 3600)}, "end_time": {"timestamp": str(BASE + 7200)}},
+    {"event_id": "spanning", "summary": "워크숍",
+     "start_time": {"timestamp": str(BASE + DAY)}, "end_time": {"timestamp": str(BASE + 3 * DAY)}},
+    {"event_id": "inside", "summary": "1:1",
+     "start_time": {"timestamp": str(BASE + 2 * DAY + 3600)}, "end_time": {"timestamp": str(BASE + 2 * DAY + 5400)}},
+    {"event_id": "after", "summary": "리뷰",
+     "start_time": {"timestamp": str(BASE + 5 * DAY)}, "end_time": {"timestamp": str(BASE + 5 * DAY + 3600)}},
+]
+
+
+def _midnight(value, days=0):
+    day = date.fromisoformat(value) + timedelta(days=days)
+    return int(datetime.combine(day, datetime.min.time(), tzinfo=KST).timestamp())
+
+
+def _upstream_overlaps(raw, start_ts, end_ts):
+    start = raw["start_time"].get("timestamp")
+    if start is None:
+        # 날짜 종일 일정은 그 날짜(시작일 ~ 종료일)가 조회 구간에 걸칠 때만 Lark 가 내려줌
+        start, end = _midnight(raw["start_time"]["date"]), _midnight(raw["end_time"]["date"], days=1)
+        return start < end_ts and end > start_ts
+    return int(start) < end_ts and int(raw["end_time"]["timestamp"]) > start_ts
+
+
+async def _fake_pages(access_token, calendar_id, start_ts, end_ts):
+    yield [e for e in RAW_EVENTS if _upstream_overlaps(e, start_ts, end_ts)]
+
+
+def _fetch(start_ts, end_ts):
+    events = asyncio.run(app._fetch_events("test-token", "cal", start_ts, end_ts))
+    return [e.event_id for e in events]
+
+
+def test_sub_range_hit_matches_cold_fetch(monkeypatch):
+    monkeypatch.setattr(lark_async_client, "iter_event_pages", _fake_pages)
+    monkeypatch.setattr(app.event_sync, "INCREMENTAL_SYNC", False)
+    sub_start, sub_end = BASE + 2 * DAY, BASE + 2 * DAY + 7200
+
+    event_cache.clear()
+    cold = _fetch(sub_start, sub_end)
+
+    event_cache.clear()
+    _fetch(BASE, BASE + 7 * DAY)
+    hits = event_cache.stats()["hits"]
+    warm = _fetch(sub_start, sub_end)
+
+    assert event_cache.stats()["hits"] == hits + 1
+    assert warm == cold
+    assert "allday" in warm
+
+
+def test_sub_range_hit_version_matches_cold_fetch(monkeypatch):
+    monkeypatch.setattr(lark_async_client, "iter_event_pages", _fake_pages)
+    monkeypatch.setattr(app.event_sync, "INCREMENTAL_SYNC", False)
+    sub_start, sub_end = BASE + 2 * DAY, BASE + 2 * DAY + 7200
+
+    event_cache.clear()
+    _, cold = asyncio.run(app._fetch_events_versioned("test-token", "cal", sub_start, sub_end))
+
+    event_cache.clear()
+    _fetch(BASE, BASE + 7 * DAY)
+    _, warm = asyncio.run(app._fetch_events_versioned("test-token", "cal", sub_start, sub_end))
+    _, again = asyncio.run(app._fetch_events_versioned("test-token", "cal", sub_start, sub_end))
+
+    assert warm == again == cold
+
+
+def test_sub_range_hit_skips_all_day_event_on_other_day(monkeypatch):
+    monkeypatch.setattr(lark_async_client, "iter_event_pages", _fake_pages)
+    monkeypatch.setattr(app.event_sync, "INCREMENTAL_SYNC", False)
+    sub_start, sub_end = BASE + 5 * DAY, BASE + 6 * DAY
+
+    event_cache.clear()
+    cold = _fetch(sub_start, sub_end)
+
+    event_cache.clear()
+    _fetch(BASE, BASE + 7 * DAY)
+    warm = _fetch(sub_start, sub_end)
+
+    assert warm == cold == ["after"]
@@ -0,0 +1,34 @@
+"""
+증분 동기화 스토어(CalendarSyncState) 구간 조회 테스트: 스토어에는 조회 구간 밖의 이벤트도 들어 있으므로
+query 는 upstream 범위 조회처럼 구간에 걸치는 이벤트만 돌려줘야 한다.
+
+    python -m pytest -q test_event_sync.py
+"""
+from event_sync import CalendarSyncState
+
+DAY = 86400
+JAN_1 = 1767193200   # 2026-01-01 00:00 KST
+MAR_10 = 1773068400  # 2026-03-10 00:00 KST
+
+
+def _state():
+    state = CalendarSyncState(anchor_ts=JAN_1 - 30 * DAY)
+    state.apply([
+        {"event_id": "vac", "summary": "휴가", "is_all_day": True,
+         "start_time": {"date": "2026-01-03"}, "end_time": {"date": "2026-01-03"}},
+        {"event_id": "standup", "summary": "스탠드업",
+         "start_time": {"timestamp": str(MAR_10 + 3600)}, "end_time": {"timestamp": str(MAR_10 + 5400)}},
+        {"event_id": "weekly", "summary": "주간 회의", "recurrence": "FREQ=WEEKLY",
+         "start_time": {"timestamp": str(JAN_1 + 36000), "timezone": "Asia/Seoul"},
+         "end_time": {"timestamp": str(JAN_1 + 39600), "timezone": "Asia/Seoul"}},
+    ])
+    return state
+
+
+def test_query_skips_all_day_event_on_other_day():
+    assert [e.event_id for e in _state().query(MAR_10, MAR_10 + DAY)] == ["weekly", "standup"]
+
+
+def test_query_keeps_all_day_event_on_its_day():
+    ids = [e.event_id for e in _state().query(JAN_1 + 2 * DAY + 3600, JAN_1 + 2 * DAY + 7200)]
+    assert ids == ["weekly", "vac"]
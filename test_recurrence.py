@@ -0,0 +1,87 @@
+"""
+반복 일정(RRULE) 전개 테스트: 회차 날짜/시각, COUNT/UNTIL, 예외 회차 대체, 삭제 표식, DST 가 있는 시간대.
+
+    python -m pytest -q test_recurrence.py
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from event_normalize import Event
+from recurrence import expand_recurring, occurrences
+
+KST = ZoneInfo("Asia/Seoul")
+NEW_YORK = ZoneInfo("America/New_York")
+HOUR = 3600
+
+
+def _ts(tz, *args):
+    return int(datetime(*args, tzinfo=tz).timestamp())
+
+
+def _local(ts_list, tz):
+    return [datetime.fromtimestamp(ts, tz).strftime("%Y-%m-%d %H:%M") for ts in ts_list]
+
+
+def test_monthly_byday_with_ordinal():
+    start = _ts(KST, 2026, 1, 13, 10)
+    found = occurrences("FREQ=MONTHLY;BYDAY=2TU", start, HOUR, "Asia/Seoul", start, _ts(KST, 2026, 5, 1))
+    assert _local(found, KST) == ["2026-01-13 10:00", "2026-02-10 10:00", "2026-03-10 10:00", "2026-04-14 10:00"]
+
+
+def test_monthly_last_weekday():
+    start = _ts(KST, 2026, 1, 30, 17)
+    found = occurrences("RRULE:FREQ=MONTHLY;BYDAY=-1FR", start, HOUR, "Asia/Seoul", start, _ts(KST, 2026, 4, 1))
+    assert _local(found, KST) == ["2026-01-30 17:00", "2026-02-27 17:00", "2026-03-27 17:00"]
+
+
+def test_count_limits_occurrences_from_dtstart():
+    start = _ts(KST, 2026, 1, 5, 9)
+    # 조회 구간이 두 번째 회차부터여도 COUNT 는 첫 회차부터 센다
+    found = occurrences("FREQ=DAILY;COUNT=3", start, HOUR, "Asia/Seoul", _ts(KST, 2026, 1, 6), _ts(KST, 2026, 2, 1))
+    assert _local(found, KST) == ["2026-01-06 09:00", "2026-01-07 09:00"]
+
+
+def test_until_date_is_inclusive():
+    start = _ts(KST, 2026, 1, 6, 14)
+    found = occurrences("FREQ=WEEKLY;UNTIL=20260120", start, HOUR, "Asia/Seoul", start, _ts(KST, 2026, 3, 1))
+    assert _local(found, KST) == ["2026-01-06 14:00", "2026-01-13 14:00", "2026-01-20 14:00"]
+
+
+def test_weekly_keeps_local_time_across_dst():
+    start = _ts(NEW_YORK, 2026, 3, 2, 9)  # 월요일, 3월 8일에 서머타임 시작
+    found = occurrences("FREQ=WEEKLY;BYDAY=MO", start, HOUR, "America/New_York", start, _ts(NEW_YORK, 2026, 3, 17))
+    assert _local(found, NEW_YORK) == ["2026-03-02 09:00", "2026-03-09 09:00", "2026-03-16 09:00"]
+    assert found[1] - found[0] == 7 * 24 * HOUR - HOUR
+
+
+def _master(start):
+    return Event("weekly_0", "주간 회의", start, start + HOUR, recurrence="FREQ=WEEKLY", timezone="Asia/Seoul")
+
+
+def test_exception_replaces_its_occurrence():
+    start = _ts(KST, 2026, 1, 5, 10)
+    second = _ts(KST, 2026, 1, 12, 10)
+    moved = Event(f"weekly_{second}", "주간 회의 (변경)", second + 4 * HOUR, second + 5 * HOUR,
+                  is_exception=True, recurring_event_id="weekly_0", timezone="Asia/Seoul")
+
+    result = expand_recurring([_master(start), moved], start, _ts(KST, 2026, 1, 20))
+
+    assert [(e.event_id, e.summary) for e in result] == [
+        (f"weekly_{start}", "주간 회의"),
+        (f"weekly_{second}", "주간 회의 (변경)"),
+        (f"weekly_{_ts(KST, 2026, 1, 19, 10)}", "주간 회의"),
+    ]
+    assert result[1].start_ts == second + 4 * HOUR
+    assert all(e.recurring_event_id == "weekly_0" for e in result)
+
+
+def test_cancelled_marker_removes_occurrence():
+    start = _ts(KST, 2026, 1, 5, 10)
+    second = _ts(KST, 2026, 1, 12, 10)
+    marker = Event(f"weekly_{second}", "", second, second + HOUR, is_exception=True,
+                   recurring_event_id="weekly_0", status="cancelled")
+
+    result = expand_recurring([_master(start), marker], start, _ts(KST, 2026, 1, 20))
+
+    assert _local([e.start_ts for e in result], KST) == ["2026-01-05 10:00", "2026-01-19 10:00"]
+    assert all(e.status is None for e in result)
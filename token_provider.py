@@ -1,29 +1,402 @@
 from __future__ import annotations
+import abc
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 from dotenv import load_dotenv
 from errors import auth_required
+from singleflight import SingleFlight
+import lark_tenant_token
+import lark_token_manager
+from token_store import TokenStore
 
 load_dotenv()
 
+# Lark access token 을 메모리에 들고 있다가 만료 전에 백그라운드에서 미리 갱신한다.
+# - 요청 경로(get_valid_access_token)는 메모리만 읽는다 (디스크 / OAuth 호출 없음)
+# - refresher 스레드가 만료 margin 초 전에 갱신
+# - 이미 만료된 경우에만 호출자가 갱신을 기다리고, 동시에 들어온 요청은 SingleFlight 로 한 번의 갱신을 공유
+# - 갱신이 실패하면 아직 유효한 토큰을 계속 쓰면서 TOKEN_REFRESH_RETRY 초 뒤 다시 시도
+#
+# 인증 방식 (LARK_AUTH_MODE)
+# - user (기본): User Access Token → 개인 캘린더
+#   1. lark_oauth.py 로그인 후 저장된 ~/.daily-focus/lark_tokens.json (만료 시각 + refresh token)
+#   2. 환경변수 LARK_USER_TOKEN (+ 선택 LARK_USER_REFRESH_TOKEN)
+#      만료 시각을 모르므로 refresh token 이 있으면 시작하자마자 한 번 갱신해 만료 시각을 얻는다.
+#   여러 워커(프로세스)는 토큰 파일 잠금(token_store)으로 한 곳만 갱신하고, 나머지는 잠금 뒤 파일에서 새 토큰을 가져감
+# - tenant: Tenant Access Token (LARK_APP_ID / LARK_APP_SECRET) → 봇 / 봇에 공유된 캘린더
+#   워커마다 따로 발급해도 같은 토큰이 내려오므로 파일 잠금 없이 각자 갱신한다.
+AUTH_MODE = os.getenv("LARK_AUTH_MODE", "user").lower()
+TOKEN_REFRESH_MARGIN = int(os.getenv("LARK_TOKEN_REFRESH_MARGIN", "600"))
+TOKEN_REFRESH_RETRY = int(os.getenv("LARK_TOKEN_REFRESH_RETRY", "60"))
+# Lark 는 남은 유효기간이 30분 미만일 때만 새 tenant token 을 내준다 → 그 안쪽에서 갱신
+TENANT_TOKEN_REFRESH_MARGIN = int(os.getenv("LARK_TENANT_TOKEN_REFRESH_MARGIN", "1200"))
+
+# lark_token_manager.save_tokens / lark_tenant_token.save_token 과 같은 여유 (access 5분, refresh 1일)
+_ACCESS_SLACK = 300
+_REFRESH_SLACK = 86400
+
+
+def _iso_ts(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class _AutoRefreshToken(abc.ABC):
+    """메모리 토큰 + 만료 전 백그라운드 갱신 공통 부분. 하위 클래스는 _load / _can_refresh / _refresh_now 구현."""
+
+    thread_name = "lark-token-refresher"
+
+    def __init__(self, margin: int) -> None:
+        self._margin = margin
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._source: Optional[str] = None
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0          # 0 = 알 수 없음 (만료 전까지 유효한 것으로 취급)
+        self._retry_at = 0.0
+        self._refreshed_at = 0.0
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._singleflight = SingleFlight()
+        self._stats = {"refreshes": 0, "refresh_failures": 0, "blocking_waits": 0, "invalidations": 0}
+        self._last_error: Optional[str] = None
+
+    # ---------- 시작 ----------
+    def start(self) -> None:
+        """토큰을 읽고 refresher 스레드 시작 (여러 번 불러도 한 번만)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+
+    @abc.abstractmethod
+    def _load(self) -> None:
+        """저장된 토큰을 메모리로 (start 에서 한 번, self._lock 안)"""
+
+    @abc.abstractmethod
+    def _can_refresh(self) -> bool:
+        """지금 갱신할 수단(refresh token, app secret 등)이 있는지"""
+
+    @abc.abstractmethod
+    def _refresh_now(self) -> str:
+        """새 토큰 발급 → 메모리 반영 후 반환. 실패하면 MCPException"""
+
+    # ---------- 요청 경로 ----------
+    def peek(self) -> Optional[str]:
+        """만료되지 않은 토큰이 메모리에 있으면 반환 (대기 없음)"""
+        self.start()
+        token, expires_at = self._access_token, self._expires_at
+        if token and (not expires_at or time.time() < expires_at):
+            return token
+        return None
+
+    def get(self) -> str:
+        token = self.peek()
+        if token:
+            return token
+        # 토큰이 없거나 만료됨 (백그라운드 갱신이 계속 실패한 경우) → 갱신을 기다림
+        with self._lock:
+            self._stats["blocking_waits"] += 1
+        return self._singleflight.do("refresh", self._refresh_now)
+
+    def invalidate(self, access_token: str) -> None:
+        """Lark 가 401 을 준 토큰 → 갱신할 수 있으면 만료 처리하고 바로 갱신 (같은 토큰 중복 보고는 무시)"""
+        with self._lock:
+            if access_token != self._access_token or not self._can_refresh():
+                return
+            if time.time() - self._refreshed_at < TOKEN_REFRESH_RETRY:
+                return  # 방금 받은 토큰 → 토큰 문제가 아닐 가능성이 큼
+            self._expires_at = time.time() - 1
+            self._stats["invalidations"] += 1
+        self._wakeup.set()
+
+    # ---------- 갱신 ----------
+    def _set_token(self, access_token: str, expires_at: float) -> None:
+        """갱신 성공 (self._lock 안에서 호출)"""
+        now = time.time()
+        self._access_token = access_token
+        self._expires_at = expires_at
+        self._refreshed_at = now
+        self._last_error = None
+        # 받은 토큰도 이미 갱신 시점이면 (남은 유효기간 < margin) 바로 다시 돌지 않도록 재시도 간격만큼 미룸
+        self._retry_at = now + TOKEN_REFRESH_RETRY if expires_at - self._margin <= now else 0.0
+        self._stats["refreshes"] += 1
+
+    def _record_failure(self, e: Exception) -> None:
+        with self._lock:
+            self._stats["refresh_failures"] += 1
+            self._last_error = str(e)
+            self._retry_at = time.time() + TOKEN_REFRESH_RETRY
+
+    def _next_refresh_in(self) -> Optional[float]:
+        """다음 갱신까지 남은 초 (None = 갱신할 수 없음)"""
+        if not self._can_refresh():
+            return None
+        now = time.time()
+        due = self._expires_at - self._margin if self._expires_at else now
+        return max(due, self._retry_at) - now
+
+    def _refresh_in_background(self) -> None:
+        """백그라운드 갱신 1회. 어떤 에러든 기록만 하고 TOKEN_REFRESH_RETRY 초 뒤 다시 시도"""
+        try:
+            self._singleflight.do("refresh", self._refresh_now)
+        except Exception as e:
+            with self._lock:
+                recorded = self._retry_at > time.time()
+            if not recorded:
+                # 갱신 API 실패는 _refresh_now 에서 이미 기록됨 → 그 밖의 에러(파일, 응답 형식 등)만
+                self._record_failure(e)
+
+    def _run(self) -> None:
+        while True:
+            delay = self._next_refresh_in()
+            if delay is not None and delay <= 0:
+                self._refresh_in_background()
+                continue
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                "source": self._source,
+                "expires_in": round(self._expires_at - now) if self._expires_at else None,
+                **self._stats,
+                "last_error": self._last_error,
+            }
+
+
+class UserTokenProvider(_AutoRefreshToken):
+    """store 를 주면 그 토큰 파일만 사용 (다중 사용자 모드의 사용자별 토큰), 없으면 lark_tokens.json + 환경변수"""
+
+    thread_name = "lark-user-token-refresher"
+
+    def __init__(self, store: Optional[TokenStore] = None) -> None:
+        super().__init__(TOKEN_REFRESH_MARGIN)
+        self._store = store or lark_token_manager.token_store
+        self._use_env = store is None
+        self._refresh_token: Optional[str] = None
+        self._refresh_expires_at = 0.0  # 0 = 알 수 없음
+        self._stats["adopted"] = 0
+
+    def _load(self) -> None:
+        data = self._store.read()
+        if data and data.get("access_token"):
+            self._apply(data)
+            return
+        token = os.getenv("LARK_USER_TOKEN") if self._use_env else None
+        if token:
+            self._source = "env"
+            self._access_token = token
+            self._refresh_token = os.getenv("LARK_USER_REFRESH_TOKEN") or None
+
+    def _apply(self, data: Dict[str, Any]) -> None:
+        """토큰 파일 내용(lark_token_manager.save_tokens 형식)을 메모리에 반영"""
+        self._source = "file"
+        self._access_token = data["access_token"]
+        self._refresh_token = data.get("refresh_token") or self._refresh_token
+        self._expires_at = _iso_ts(data.get("expires_at"))
+        self._refresh_expires_at = _iso_ts(data.get("refresh_expires_at"))
+
+    def _can_refresh(self) -> bool:
+        if not self._refresh_token:
+            return False
+        return not (self._refresh_expires_at and time.time() >= self._refresh_expires_at)
+
+    def _refresh_now(self) -> str:
+        if not self._access_token:
+            # 시작한 뒤에 로그인해서 토큰 파일이 생겼을 수 있음 (파일이 그대로면 stat 한 번)
+            data = self._store.read()
+            if data and data.get("access_token"):
+                with self._lock:
+                    self._apply(data)
+                return data["access_token"]
+            if not self._use_env:
+                raise auth_required("No Lark token stored for this user. Run: python3 lark_oauth.py --user <user_id>")
+            raise auth_required(
+                "Missing LARK_USER_TOKEN in environment. "
+                "Run: python3 lark_oauth.py"
+            )
+        try:
+            # 여러 워커 중 한 곳만 refresh token 을 쓰도록 토큰 파일 잠금 안에서 갱신
+            with self._store.lock():
+                return self._refresh_locked()
+        except OSError:
+            # 잠금 파일을 만들 수 없음 (읽기 전용 홈 등) → 프로세스 내 SingleFlight 로만 조율
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> str:
+        # 잠금을 기다리는 동안 다른 워커가 이미 갱신했으면 그 토큰을 그대로 사용
+        stored = self._store.read()
+        if stored and stored.get("access_token") and stored["access_token"] != self._access_token \
+                and _iso_ts(stored.get("expires_at")) - self._margin > time.time():
+            with self._lock:
+                self._apply(stored)
+                self._retry_at = 0.0
+                self._refreshed_at = time.time()
+                self._stats["adopted"] += 1
+            self._wakeup.set()
+            return stored["access_token"]
+        if stored and stored.get("refresh_token") and self._source == "file":
+            # 다른 워커가 refresh token 만 바꿔 둔 경우까지 최신 값으로
+            self._refresh_token = stored["refresh_token"]
+
+        refresh_token = self._refresh_token
+        if not refresh_token:
+            raise auth_required("Lark user token expired and no refresh token is available. Run: python3 lark_oauth.py")
+        if not self._can_refresh():
+            raise auth_required("Lark refresh token expired. Run: python3 lark_oauth.py")
+
+        try:
+            new = lark_token_manager.refresh_access_token(refresh_token)
+        except Exception as e:
+            self._record_failure(e)
+            raise auth_required("Failed to refresh Lark user token.", {"exception": str(e)})
+
+        now = time.time()
+        with self._lock:
+            self._source = "file"
+            self._refresh_token = new["refresh_token"] or refresh_token
+            self._refresh_expires_at = now + new["refresh_expires_in"] - _REFRESH_SLACK
+            self._set_token(new["access_token"], now + new["expires_in"] - _ACCESS_SLACK)
+        try:
+            # 다른 워커와 재시작 후에도 새 토큰을 쓰도록 저장 (실패해도 메모리 토큰은 그대로 사용)
+            self._save(new["access_token"], self._refresh_token, new["expires_in"], new["refresh_expires_in"])
+        except OSError as e:
+            with self._lock:
+                self._last_error = f"save failed: {e}"
+        self._wakeup.set()
+        return new["access_token"]
+
+    def _save(self, access_token: str, refresh_token: str, expires_in: int, refresh_expires_in: int) -> None:
+        if self._use_env:
+            # 기본 토큰은 .env 의 LARK_USER_TOKEN 도 같이 갱신
+            lark_token_manager.save_tokens(access_token, refresh_token, expires_in, refresh_expires_in)
+            return
+        data = lark_token_manager.make_token_data(access_token, refresh_token, expires_in, refresh_expires_in)
+        stored = self._store.read() or {}
+        if stored.get("user_id"):
+            data["user_id"] = stored["user_id"]
+        self._store.write(data)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            **super().stats(),
+            "has_refresh_token": bool(self._refresh_token),
+            "refresh_expires_in": round(self._refresh_expires_at - now) if self._refresh_expires_at else None,
+        }
+
+
+class TenantTokenProvider(_AutoRefreshToken):
+    thread_name = "lark-tenant-token-refresher"
+
+    def __init__(self) -> None:
+        super().__init__(TENANT_TOKEN_REFRESH_MARGIN)
+
+    def _load(self) -> None:
+        # 재시작 직후 발급 API 를 다시 부르지 않도록 캐시 파일에서 시작 (만료됐으면 refresher 가 바로 발급)
+        data = lark_tenant_token.load_token_data()
+        if data and data.get("token"):
+            self._source = "file"
+            self._access_token = data["token"]
+            self._expires_at = _iso_ts(data.get("expires_at")) or time.time() - 1
+
+    def _can_refresh(self) -> bool:
+        return bool(lark_tenant_token.LARK_APP_ID and lark_tenant_token.LARK_APP_SECRET)
+
+    def _refresh_now(self) -> str:
+        if not self._can_refresh():
+            raise auth_required("Missing LARK_APP_ID / LARK_APP_SECRET in environment.")
+        try:
+            new = lark_tenant_token.get_tenant_access_token()
+        except Exception as e:
+            self._record_failure(e)
+            raise auth_required("Failed to fetch Lark tenant access token.", {"exception": str(e)})
+
+        with self._lock:
+            self._source = "api"
+            self._set_token(new["token"], time.time() + new["expires_in"] - _ACCESS_SLACK)
+        try:
+            lark_tenant_token.save_token(new["token"], new["expires_in"])
+        except OSError as e:
+            with self._lock:
+                self._last_error = f"save failed: {e}"
+        self._wakeup.set()
+        return new["token"]
+
+
+user_tokens = UserTokenProvider()
+tenant_tokens = TenantTokenProvider()
+
+
+def _active() -> _AutoRefreshToken:
+    return tenant_tokens if AUTH_MODE == "tenant" else user_tokens
+
+
+def start_token_refresh() -> None:
+    """현재 인증 방식의 토큰을 메모리로 올리고 자동 갱신 시작"""
+    _active().start()
+
 
 def get_valid_access_token() -> str:
     """
-    User Access Token 사용 (개인 캘린더 접근):
-    - 사용자의 개인 캘린더에 직접 접근 가능
-    - OAuth 로그인으로 발급
-    - 유효기간: 약 30일
+    LARK_AUTH_MODE 에 따른 access token (메모리 캐시, 만료 전 백그라운드 자동 갱신)
 
-    ⚠️ 주의: 토큰이 만료되면 다시 로그인 필요
+    user (기본) - User Access Token (개인 캘린더 접근):
+    - 사용자의 개인 캘린더에 직접 접근 가능
+    - OAuth 로그인으로 발급, refresh token 이 있으면 자동 갱신
+    ⚠️ 주의: refresh token 도 만료되면 다시 로그인 필요
     로컬: python3 lark_oauth.py
-    Railway: 환경변수 LARK_USER_TOKEN 업데이트
+    Railway: 환경변수 LARK_USER_TOKEN (+ LARK_USER_REFRESH_TOKEN) 업데이트
+
+    tenant - Tenant Access Token (봇 / 봇에 공유된 캘린더):
+    - LARK_APP_ID / LARK_APP_SECRET 만으로 발급, 로그인 불필요
     """
-    token = os.getenv("LARK_USER_TOKEN")
-    if not token:
-        raise auth_required(
-            "Missing LARK_USER_TOKEN in environment. "
-            "Run: python3 lark_oauth.py"
-        )
-    return token
+    return _active().get()
+
+
+async def get_valid_access_token_async() -> str:
+    """이벤트 루프용: 보통은 메모리만 읽고, 만료돼 갱신을 기다려야 할 때만 스레드에서 대기"""
+    provider = _active()
+    token = provider.peek()
+    if token:
+        return token
+    return await asyncio.to_thread(provider.get)
+
+
+_invalid_token_listeners: List[Callable[[str], None]] = []
+
+
+def on_invalid_token(listener: Callable[[str], None]) -> None:
+    """report_invalid_token 을 함께 받을 곳 등록 (user_pool 의 사용자별 토큰)"""
+    _invalid_token_listeners.append(listener)
+
+
+def report_invalid_token(access_token: str) -> None:
+    """Lark 가 401 로 거절한 토큰 → 다음 요청부터 새 토큰을 쓰도록 갱신"""
+    _active().invalidate(access_token)
+    for listener in _invalid_token_listeners:
+        listener(access_token)
+
+
+def token_stats() -> Dict[str, Any]:
+    return {"auth_mode": AUTH_MODE, **_active().stats()}
 
 
 def get_bot_token() -> str:
@@ -34,3 +407,8 @@ def get_bot_token() -> str:
     if not token:
         raise auth_required("Missing LARK_BOT_TOKEN in environment.")
     return token
+
+
+def token_scope(access_token: str) -> str:
+    """캐시 키 등에 토큰 원문을 두지 않기 위한 짧은 해시"""
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
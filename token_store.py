@@ -0,0 +1,86 @@
+from __future__ import annotations
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows → 프로세스 간 잠금 없이 프로세스 내 잠금만
+    fcntl = None
+
+# 여러 uvicorn 워커가 같은 토큰 파일을 공유할 때 쓰는 저장소
+# - 쓰기: 같은 디렉터리의 임시 파일에 쓰고 fsync 후 os.replace → 읽는 쪽은 항상 완성된 파일만 본다
+# - 읽기: (mtime, size, inode) 가 그대로면 메모리에 들고 있는 값을 반환 (stat 한 번)
+# - 잠금: <파일>.lock 에 fcntl.flock (advisory). 갱신처럼 "읽고 → 판단하고 → 쓰는" 구간을 감싼다.
+#   잠금을 잡은 뒤 파일을 다시 읽어 이미 다른 워커가 갱신했으면 그 토큰을 쓰면 된다.
+
+
+class TokenStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._thread_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_stat: Optional[Tuple[int, int, int]] = None
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """파일 내용 (없거나 깨졌으면 None). 파일이 바뀌지 않았으면 디스크를 읽지 않는다."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._cache_lock:
+            if key == self._cached_stat:
+                return self._cached
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._cache_lock:
+            self._cached, self._cached_stat = data, key
+        return data
+
+    def write(self, data: Dict[str, Any]) -> None:
+        """임시 파일 + rename 으로 원자적 교체 (본인만 읽을 수 있게 0600)"""
+        write_atomic(self.path, json.dumps(data, indent=2, ensure_ascii=False))
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """프로세스 간 배타 잠금 (같은 프로세스의 스레드끼리도 배타)"""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, "a") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def write_atomic(path: Path, text: str, mode: int = 0o600) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Dict, Mapping, Optional
+
+from errors import auth_required
+import lark_token_manager
+import token_provider
+from token_provider import UserTokenProvider
+
+# 다중 사용자 모드: 한 프로세스가 여러 Lark 사용자의 캘린더를 대신 조회한다.
+# - 요청마다 USER_HEADER 헤더로 사용자 식별 (세션 ID 등 다른 값으로 추정하지 않음)
+# - 토큰 파일(lark_token_manager.user_token_store)이 있는 사용자만 풀에 올린다 → 임의의 헤더 값으로 LRU 를 밀어내지 못함
+# - 사용자 → 토큰 상태(PooledUserToken)를 LRU 로 최대 USER_POOL_SIZE 명까지 메모리에 둔다.
+#   밀려난 사용자는 다음 요청에서 토큰 파일을 한 번 다시 읽는다.
+# - 사용자마다 갱신/실패/재시도 상태가 따로 → 한 사용자의 refresh 실패가 다른 사용자에게 번지지 않음
+# - 사용자마다 스레드를 두지 않고, 요청 때 갱신 시점이 지났으면 공용 executor 에서 백그라운드 갱신
+# - 요청한 사용자 ID 는 current_user 에 남겨 rate limit 의 사용자 버킷 키로 쓴다 (토큰이 갱신돼도 같은 버킷)
+#
+# ⚠️ 사용자 헤더를 그대로 믿으므로, 요청마다 인증한 사용자로 헤더를 덮어쓰는 게이트웨이 뒤에서만 켤 것
+MULTI_USER = os.getenv("LARK_MULTI_USER", "false").lower() in ("1", "true", "yes")
+USER_HEADER = os.getenv("LARK_USER_HEADER", "X-Lark-User")
+USER_POOL_SIZE = int(os.getenv("LARK_USER_POOL_SIZE", "1024"))
+USER_REFRESH_CONCURRENCY = int(os.getenv("LARK_USER_REFRESH_CONCURRENCY", "4"))
+
+# 현재 요청의 사용자 ID (다중 사용자 모드에서 get_token_async 가 설정)
+current_user: ContextVar[Optional[str]] = ContextVar("lark_user", default=None)
+
+_refresh_pool = ThreadPoolExecutor(max_workers=USER_REFRESH_CONCURRENCY, thread_name_prefix="lark-user-refresh")
+
+
+class PooledUserToken(UserTokenProvider):
+    """사용자별 토큰 (refresher 스레드 없이 요청 시점에 백그라운드 갱신 예약)"""
+
+    def __init__(self, user_id: str) -> None:
+        super().__init__(store=lark_token_manager.user_token_store(user_id))
+        self._refreshing = False
+
+    @property
+    def has_token(self) -> bool:
+        return bool(self._access_token)
+
+    def start(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def peek(self) -> Optional[str]:
+        token = super().peek()
+        delay = self._next_refresh_in()
+        if delay is not None and delay <= 0:
+            self._schedule_refresh()
+        return token
+
+    def _schedule_refresh(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        _refresh_pool.submit(self._background_refresh)
+
+    def _background_refresh(self) -> None:
+        try:
+            self._refresh_in_background()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+class UserTokenPool:
+    def __init__(self, max_users: int = USER_POOL_SIZE) -> None:
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, PooledUserToken]" = OrderedDict()
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0, "unknown_users": 0}
+
+    def resolve_user(self, headers: Mapping[str, str]) -> str:
+        """요청 헤더 → 사용자 ID"""
+        user_id = (headers.get(USER_HEADER) or "").strip()
+        if not user_id:
+            raise auth_required(f"Missing {USER_HEADER} header (multi-user mode).")
+        return user_id
+
+    def _get(self, user_id: str) -> Optional[PooledUserToken]:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+                self._stats["hits"] += 1
+            return entry
+
+    def _load(self, user_id: str) -> PooledUserToken:
+        """토큰 파일을 읽어 보고, 토큰이 있을 때만 풀에 넣음 (없으면 풀을 건드리지 않고 auth_required)"""
+        entry = PooledUserToken(user_id)
+        entry.start()
+        if not entry.has_token:
+            with self._lock:
+                self._stats["unknown_users"] += 1
+            raise auth_required(
+                "No Lark token stored for this user. Run: python3 lark_oauth.py --user <user_id>",
+                {"user_id": user_id},
+            )
+        with self._lock:
+            existing = self._users.get(user_id)
+            if existing is not None:
+                return existing  # 동시에 읽은 다른 요청이 먼저 넣음
+            self._users[user_id] = entry
+            self._stats["loads"] += 1
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self._stats["evictions"] += 1
+        return entry
+
+    def provider(self, user_id: str) -> PooledUserToken:
+        return self._get(user_id) or self._load(user_id)
+
+    async def get_token_async(self, headers: Mapping[str, str]) -> str:
+        """요청의 사용자 토큰. 처음 보는 사용자면 토큰 파일 읽기, 만료됐으면 갱신을 스레드에서 기다림"""
+        user_id = self.resolve_user(headers)
+        current_user.set(user_id)
+        entry = self._get(user_id) or await asyncio.to_thread(self._load, user_id)
+        token = entry.peek()
+        if token:
+            return token
+        return await asyncio.to_thread(entry.get)
+
+    def invalidate(self, access_token: str) -> None:
+        with self._lock:
+            entries = list(self._users.values())
+        for entry in entries:
+            entry.invalidate(access_token)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": MULTI_USER,
+                "users": len(self._users),
+                "max_users": self.max_users,
+                **self._stats,
+            }
+
+
+user_pool = UserTokenPool()
+token_provider.on_invalid_token(user_pool.invalidate)
+
+
+def pool_stats() -> Dict[str, Any]:
+    return user_pool.stats()